@@ -3,12 +3,27 @@
 Enrichment service configuration
 """
 import os
+from functools import cache
 from typing import List, Optional
 from enum import Enum
 import dotenv
 
+# Exported into os.environ: GLiNER/OpenAI config and the Google SDKs read it directly
 dotenv.load_dotenv()
 
+# Snapshot the environment once at import; settings read from this map
+_ENV = dict(os.environ)
+
+
+def _int_env(key: str, default: int) -> int:
+    """Read an integer setting from the environment snapshot"""
+    return int(_ENV.get(key, default))
+
+
+def _list_env(key: str, default: str = "") -> List[str]:
+    """Read a comma-separated list setting from the environment snapshot"""
+    return [item.strip() for item in _ENV.get(key, default).split(",") if item.strip()]
+
 
 class Environment(str, Enum):
     """Environment types"""
@@ -21,36 +36,53 @@ class BaseSettings:
     """Base settings shared across all environments"""
     
     # GCP
-    GCP_PROJECT_ID: str = os.getenv("GCP_PROJECT_ID", "")
-    GCP_REGION: str = os.getenv("GCP_REGION", "europe-west1")
+    GCP_PROJECT_ID: str = _ENV.get("GCP_PROJECT_ID", "")
+    GCP_REGION: str = _ENV.get("GCP_REGION", "europe-west1")
     
     # Pub/Sub
-    PUBSUB_TOPIC: str = os.getenv("PUBSUB_TOPIC", "enrichment-requests")
-    PUBSUB_SUBSCRIPTION: str = os.getenv("PUBSUB_SUBSCRIPTION", "enrichment-worker")
+    PUBSUB_TOPIC: str = _ENV.get("PUBSUB_TOPIC", "enrichment-requests")
+    PUBSUB_SUBSCRIPTION: str = _ENV.get("PUBSUB_SUBSCRIPTION", "enrichment-worker")
+    PUBSUB_BATCH_SIZE: int = _int_env("PUBSUB_BATCH_SIZE", 100)  # messages per worker pull
+    PUBSUB_ACK_DEADLINE: int = _int_env("PUBSUB_ACK_DEADLINE", 60)  # seconds each lease extension grants
+    PUBSUB_MAX_LEASE: int = _int_env("PUBSUB_MAX_LEASE", 3600)  # stop extending after this long in flight
+    PUBSUB_NACK_DELAY: int = _int_env("PUBSUB_NACK_DELAY", 30)  # seconds before a nacked message is redelivered
     
     # Redis (Memorystore)
-    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
-    REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
-    REDIS_PASSWORD: Optional[str] = os.getenv("REDIS_PASSWORD")
-    REDIS_TTL: int = int(os.getenv("REDIS_TTL", 3600))  # 1 hour
+    REDIS_HOST: str = _ENV.get("REDIS_HOST", "localhost")
+    REDIS_PORT: int = _int_env("REDIS_PORT", 6379)
+    REDIS_PASSWORD: Optional[str] = _ENV.get("REDIS_PASSWORD")
+    REDIS_TTL: int = _int_env("REDIS_TTL", 3600)  # 1 hour
     
     # Supabase
-    SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
-    SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
+    SUPABASE_URL: str = _ENV.get("SUPABASE_URL", "")
+    SUPABASE_KEY: str = _ENV.get("SUPABASE_KEY", "")
     
     # LLM
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "gpt-4.1-nano")
+    OPENAI_API_KEY: str = _ENV.get("OPENAI_API_KEY", "")
+    DEFAULT_MODEL: str = _ENV.get("DEFAULT_MODEL", "gpt-4.1-nano")
     
     # Service
     SERVICE_NAME: str = "enrichment-service"
-    SERVICE_MODE: str = os.getenv("SERVICE_MODE", "api")  # api or worker
+    SERVICE_MODE: str = _ENV.get("SERVICE_MODE", "api")  # api or worker
     APP_VERSION: str = "1.0.0"
-    MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", 10))
-    BATCH_SIZE: int = int(os.getenv("BATCH_SIZE", 10))
+    MAX_WORKERS: int = _int_env("MAX_WORKERS", 10)
+    BATCH_SIZE: int = _int_env("BATCH_SIZE", 10)
+    MAX_CONCURRENT_BATCHES: int = _int_env("MAX_CONCURRENT_BATCHES", 4)  # background batches per API process
+    BATCH_MAX_CONCURRENCY: int = _int_env("BATCH_MAX_CONCURRENCY", 32)  # messages in flight per parallel batch
+    MIN_ENRICH_LEN: int = _int_env("MIN_ENRICH_LEN", 10)  # shorter content is skipped without an LLM call
+    HEALTH_CHECK_INTERVAL: int = _int_env("HEALTH_CHECK_INTERVAL", 15)  # seconds between cached dependency checks
+    
+    # CORS - explicit origins (comma-separated) and/or a regex for origin families.
+    # Defaults to "*" as before; deployments narrow it by setting CORS_ORIGINS
+    CORS_ORIGINS: List[str] = _list_env("CORS_ORIGINS", "*")
+    CORS_ORIGIN_REGEX: Optional[str] = _ENV.get("CORS_ORIGIN_REGEX")
+    CORS_MAX_AGE: int = _int_env("CORS_MAX_AGE", 86400)  # browsers cache preflights for a day
+    
+    # Serve /docs and /openapi.json (schema and examples are built on first request)
+    ENABLE_OPENAPI: bool = _ENV.get("ENABLE_OPENAPI", "true").lower() == "true"
     
     # Environment
-    ENVIRONMENT: str = os.getenv("ENVIRONMENT", Environment.LOCAL.value)
+    ENVIRONMENT: str = _ENV.get("ENVIRONMENT", Environment.LOCAL.value)
 
 
 class LocalSettings(BaseSettings):
@@ -59,8 +91,8 @@ class LocalSettings(BaseSettings):
     LOG_LEVEL: str = "DEBUG"
     
     # Override for local development
-    SERVICE_MODE: str = os.getenv("SERVICE_MODE", "api")
-    MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", 2))
+    SERVICE_MODE: str = _ENV.get("SERVICE_MODE", "api")
+    MAX_WORKERS: int = _int_env("MAX_WORKERS", 2)
 
 
 class StagingSettings(BaseSettings):
@@ -79,17 +111,18 @@ class ProdSettings(BaseSettings):
     MAX_WORKERS: int = 50
 
 
+_SETTINGS_MAP = {
+    Environment.LOCAL.value: LocalSettings,
+    Environment.STAGING.value: StagingSettings,
+    Environment.PROD.value: ProdSettings,
+}
+
+
+@cache
 def get_settings() -> BaseSettings:
-    """Factory function to get settings based on environment"""
-    env = os.getenv("ENVIRONMENT", Environment.LOCAL.value).lower()
-    
-    settings_map = {
-        Environment.LOCAL.value: LocalSettings,
-        Environment.STAGING.value: StagingSettings,
-        Environment.PROD.value: ProdSettings,
-    }
-    
-    settings_class = settings_map.get(env, LocalSettings)
+    """Factory function to get settings based on environment (built once per process)"""
+    env = _ENV.get("ENVIRONMENT", Environment.LOCAL.value).lower()
+    settings_class = _SETTINGS_MAP.get(env, LocalSettings)
     return settings_class()
 
 
@@ -1,12 +1,41 @@
 # core/__init__.py
-from .llm import LLMClient
-from .redis import RedisClient
-from .pubsub import PubSubClient
-from .supabase import supabase
+from importlib import import_module
+from typing import Any, Dict
 
-# Initialize singletons
-llm_client = LLMClient()
-redis_client = RedisClient()
-pubsub_client = PubSubClient()
+from .supabase import get_supabase
 
-__all__ = ["llm_client", "redis_client", "pubsub_client", "supabase"]
\ No newline at end of file
+# Importing the submodule binds ``core.supabase`` to it; drop that binding so
+# the name resolves to the lazily created client below
+globals().pop("supabase")
+
+# Singletons are created on first access (PEP 562) so processes only
+# open the connections they actually use
+_SINGLETONS = {
+    "llm_client": (".llm", "LLMClient"),
+    "redis_client": (".redis", "RedisClient"),
+    "pubsub_client": (".pubsub", "PubSubClient"),
+    "supabase": (".supabase", "get_supabase"),
+}
+_INSTANCES: Dict[str, Any] = {}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _SINGLETONS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    if name not in _INSTANCES:
+        module_name, attr_name = _SINGLETONS[name]
+        factory = getattr(import_module(module_name, __name__), attr_name)
+        _INSTANCES[name] = factory()
+    return _INSTANCES[name]
+
+
+async def close_clients() -> None:
+    """Close any singletons that were created and hold open connections"""
+    for instance in list(_INSTANCES.values()):
+        aclose = getattr(instance, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+__all__ = ["llm_client", "redis_client", "pubsub_client", "supabase", "get_supabase", "close_clients"]
@@ -1,17 +1,28 @@
 # core/llm.py - OpenAI client
 """Async LLM client using OpenAI Chat Completions API"""
-from typing import Iterable, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
 from config import settings
 import logging
 import os
 import asyncio
-import json
+import re
+import orjson
+import httpx
 from openai import AsyncOpenAI
 
-
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# JSON payload inside a ```json fence, or the outermost braces of bare text
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+_JSON_BLOCK = re.compile(r"\{.*\}", re.DOTALL)
+
+
+@lru_cache(maxsize=32)
+def _system_message(system_prompt: str) -> Dict[str, str]:
+    """Build the (read-only) system message once per distinct system prompt."""
+    return {"role": "system", "content": system_prompt}
+
 
 class LLMClient:
     """LLM client targeting gpt-4.1-nano for lowest cost."""
@@ -22,10 +33,18 @@ class LLMClient:
             raise ValueError("OPENAI_API_KEY is required for LLM access")
 
         self.model = model or getattr(settings, "DEFAULT_MODEL", "gpt-4.1-nano")
-        self.client = AsyncOpenAI(api_key=api_key)
 
-        logger.info("Initialized OpenAI LLM client")
-        logger.info(f"Model: {self.model}")
+        # One pooled HTTP client for the process so completions reuse keep-alive connections
+        self._http = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+        self.client = AsyncOpenAI(api_key=api_key, http_client=self._http)
+
+        # Bound in-flight completions so large batches don't trip OpenAI rate limits
+        self._semaphore = asyncio.Semaphore(settings.MAX_WORKERS)
+
+        logger.info("Initialized OpenAI LLM client (model: %s)", self.model)
 
     async def complete(
         self,
@@ -36,16 +55,17 @@ class LLMClient:
     ) -> str:
         """Single completion using Chat Completions API."""
 
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message},
-            ],
-            temperature=temperature,
-            max_tokens=max_tokens,
-            response_format={"type": "json_object"},
-        )
+        async with self._semaphore:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    _system_message(system_prompt),
+                    {"role": "user", "content": user_message},
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"},
+            )
 
         return self._extract_text(response)
 
@@ -55,28 +75,73 @@ class LLMClient:
         user_messages: Iterable[str],
         temperature: float = 0.1,
         max_tokens: int = 500,
+        max_retries: int = 3,
     ) -> list[str]:
-        """Run multiple prompts concurrently; still uses cheapest model."""
-
-        tasks = [
-            asyncio.create_task(
-                self.complete(
-                    system_prompt=system_prompt,
-                    user_message=message,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                )
+        """Run multiple prompts concurrently (bounded by the client semaphore),
+        retrying only the failed ones with exponential backoff."""
+
+        messages = list(user_messages)
+        results: list = [None] * len(messages)
+        pending = list(range(len(messages)))
+
+        for attempt in range(max_retries + 1):
+            if attempt:
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+            outcomes = await asyncio.gather(
+                *(
+                    self.complete(
+                        system_prompt=system_prompt,
+                        user_message=messages[i],
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                    )
+                    for i in pending
+                ),
+                return_exceptions=True,
             )
-            for message in user_messages
-        ]
 
-        return await asyncio.gather(*tasks)
+            failed = []
+            for i, outcome in zip(pending, outcomes):
+                results[i] = outcome
+                if isinstance(outcome, Exception):
+                    failed.append(i)
+            if not failed:
+                return results
+
+            logger.warning("%d/%d completions failed (attempt %d)", len(failed), len(messages), attempt + 1)
+            pending = failed
+
+        raise results[pending[0]]
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+
+        await self.client.close()
+
+    @staticmethod
+    def extract_json(text: str) -> Optional[str]:
+        """Return the JSON object embedded in an LLM reply, if any."""
+
+        match = _JSON_FENCE.search(text)
+        if match:
+            return match.group(1)
+        match = _JSON_BLOCK.search(text)
+        return match.group(0) if match else None
 
     @staticmethod
     def _extract_text(response) -> str:
         """Normalize Chat Completions output to plain text."""
 
-        # Convert to dict early for consistent access across SDK shapes
+        # Fast path: plain string content on the SDK objects
+        try:
+            content = response.choices[0].message.content
+        except (AttributeError, IndexError, KeyError, TypeError):
+            content = None
+        if isinstance(content, str) and content:
+            return content
+
+        # Fall back to a dict view for consistent access across SDK shapes
         dump = response.model_dump(exclude_none=True) if hasattr(response, "model_dump") else None
         if dump:
             choices_dump = dump.get("choices")
@@ -166,6 +231,6 @@ class LLMClient:
         """Convert parsed JSON content into a string payload."""
 
         try:
-            return json.dumps(parsed)
+            return orjson.dumps(parsed).decode()
         except Exception:
             return str(parsed)
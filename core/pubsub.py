@@ -2,9 +2,11 @@
 """
 Google Cloud Pub/Sub client
 """
+import asyncio
+from typing import Union
 from google.cloud import pubsub_v1
 from config import settings
-import json
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,7 +16,18 @@ class PubSubClient:
     """Pub/Sub client wrapper"""
     
     def __init__(self):
-        self.publisher = pubsub_v1.PublisherClient()
+        # Let the client library coalesce concurrent publishes into one RPC
+        self.publisher = pubsub_v1.PublisherClient(
+            batch_settings=pubsub_v1.types.BatchSettings(
+                max_messages=100,
+                max_latency=0.01
+            ),
+            # gzip the publish RPCs; batches of JSON messages compress well
+            publisher_options=pubsub_v1.types.PublisherOptions(
+                enable_grpc_compression=True,
+                compression_bytes_threshold=1024
+            )
+        )
         self.subscriber = pubsub_v1.SubscriberClient()
         self.topic_path = self.publisher.topic_path(
             settings.GCP_PROJECT_ID,
@@ -26,14 +39,14 @@ class PubSubClient:
         )
         logger.info("PubSub client initialized")
     
-    async def publish(self, message: dict) -> str:
-        """Publish message to topic"""
+    async def publish(self, message: Union[dict, bytes]) -> str:
+        """Publish message to topic (bytes are sent as already-encoded JSON)"""
         try:
-            data = json.dumps(message).encode('utf-8')
+            data = message if isinstance(message, bytes) else orjson.dumps(message)
             future = self.publisher.publish(self.topic_path, data)
-            message_id = future.result()
+            message_id = await asyncio.wrap_future(future)
             logger.debug(f"Published message: {message_id}")
             return message_id
         except Exception as e:
             logger.error(f"PubSub publish error: {e}")
-            raise
\ No newline at end of file
+            raise
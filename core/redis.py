@@ -2,37 +2,181 @@
 """
 Redis client for caching
 """
-import redis
-import json
-from typing import Optional, Any
+import asyncio
+import time
+from redis import asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError
+import orjson
+from typing import Optional, Any, Awaitable, Callable, Dict, List, Set
 from config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class RedisClient:
-    """Redis client wrapper for caching"""
-    
-    def __init__(self):
-        self.client = redis.Redis(
+def _encode(value: Any) -> bytes:
+    """Serialize a cache value; bytes are taken as already-encoded JSON"""
+    if isinstance(value, bytes):
+        return value
+    return orjson.dumps(value)
+
+
+# Per-workload pool sizes; health probes get a short timeout so a stuck
+# cache operation can't make readiness flap
+QUEUE_POOL_SIZE = 10
+HEALTH_POOL_SIZE = 2
+HEALTH_SOCKET_TIMEOUT = 2.0
+
+# Back-off (seconds) before each retry when the non-blocking cache pool is exhausted
+POOL_RETRY_DELAYS = (0.01, 0.05, 0.2)
+
+
+def _redis(max_connections: int, socket_timeout: Optional[float] = None) -> aioredis.Redis:
+    """Client over its own pool (connections are opened lazily)"""
+    # Connection settings live on the pool; the client ignores them when a pool is given.
+    # Non-blocking, so an exhausted pool fails fast
+    return aioredis.Redis(
+        connection_pool=aioredis.ConnectionPool(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
             password=settings.REDIS_PASSWORD,
             decode_responses=True,
-            connection_pool=redis.BlockingConnectionPool(
-                max_connections=50,
-                timeout=20
-            )
+            max_connections=max_connections,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            socket_keepalive=True,
+            health_check_interval=30,
+            retry_on_timeout=False
         )
+    )
+
+
+class _KeyWaiter:
+    """One SUBSCRIBE connection per process, fanning published values out to waiters.
+
+    Channels are subscribed while at least one waiter wants them, so concurrent
+    waits share a single pooled connection instead of holding one each.
+    """
+    
+    def __init__(self, client: aioredis.Redis):
+        self._client = client
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._unsubscribes: Set[asyncio.Task] = set()
+    
+    async def register(self, key: str) -> asyncio.Future:
+        """Future resolved with the next value published on the key's channel"""
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(key, set())
+        waiters.add(future)
+        if len(waiters) == 1:
+            try:
+                if self._pubsub is None:
+                    self._pubsub = self._client.pubsub()
+                await self._pubsub.subscribe(key)
+            except Exception:
+                self.unregister(key, future)
+                raise
+            if self._listener is None or self._listener.done():
+                self._listener = asyncio.create_task(self._listen())
+        return future
+    
+    def unregister(self, key: str, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+        waiters.discard(future)
+        if not waiters:
+            del self._waiters[key]
+            if self._pubsub is not None:
+                task = asyncio.create_task(self._unsubscribe(key))
+                self._unsubscribes.add(task)
+                task.add_done_callback(self._unsubscribes.discard)
+    
+    async def _unsubscribe(self, key: str) -> None:
+        try:
+            # A waiter may have re-registered the key in the meantime
+            if key not in self._waiters and self._pubsub is not None:
+                await self._pubsub.unsubscribe(key)
+        except Exception as e:
+            logger.debug(f"Redis unsubscribe error: {e}")
+    
+    async def _listen(self) -> None:
+        while self._waiters:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as e:
+                # Waiters keep polling the key meanwhile; reconnect and resubscribe
+                logger.error(f"Redis subscriber error: {e}")
+                await self._reset()
+                await asyncio.sleep(1.0)
+                continue
+            if not message or message.get("type") != "message" or not message.get("data"):
+                continue
+            for future in self._waiters.get(message["channel"], ()):
+                if not future.done():
+                    future.set_result(message["data"])
+    
+    async def _reset(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+        if self._waiters:
+            try:
+                self._pubsub = self._client.pubsub()
+                await self._pubsub.subscribe(*self._waiters)
+            except Exception as e:
+                logger.error(f"Redis resubscribe error: {e}")
+    
+    async def aclose(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        self._waiters.clear()
+        await self._reset()
+
+
+class RedisClient:
+    """Redis client wrapper for caching"""
+    
+    def __init__(self):
+        # Cache GET/SET traffic, sized to the busiest caller: worker slots or one
+        # parallel batch, each doing a get and a set per message
+        self.cache = _redis(max(settings.MAX_WORKERS, settings.BATCH_MAX_CONCURRENCY) * 2)
+        # List/blocking operations, kept off the cache pool
+        self.queue = _redis(QUEUE_POOL_SIZE)
+        self.health = _redis(HEALTH_POOL_SIZE, socket_timeout=HEALTH_SOCKET_TIMEOUT)
+        # Shared by every wait_for_key call; holds one queue-pool connection
+        self._key_waiter = _KeyWaiter(self.queue)
+        # Existing callers reach the raw cache client through ``client``
+        self.client = self.cache
         logger.info("Redis client initialized")
     
+    async def ping(self) -> bool:
+        """Round trip on the dedicated health pool (raises on failure)"""
+        return await self.health.ping()
+    
+    @staticmethod
+    async def _with_pool_retry(operation: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a cache operation, backing off briefly while the pool has no free connection"""
+        for delay in POOL_RETRY_DELAYS:
+            try:
+                return await operation()
+            except RedisConnectionError as e:
+                if "Too many connections" not in str(e):
+                    raise
+                await asyncio.sleep(delay)
+        return await operation()
+    
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         try:
-            value = self.client.get(key)
+            value = await self._with_pool_retry(lambda: self.client.get(key))
             if value:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except Exception as e:
             logger.error(f"Redis get error: {e}")
@@ -47,12 +191,91 @@ class RedisClient:
         """Set value in cache"""
         try:
             ttl = ttl or settings.REDIS_TTL
-            self.client.setex(
-                key,
-                ttl,
-                json.dumps(value)
-            )
+            data = _encode(value)
+            await self._with_pool_retry(lambda: self.client.setex(key, ttl, data))
             return True
         except Exception as e:
             logger.error(f"Redis set error: {e}")
             return False
+    
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get many values from cache in a single round trip"""
+        if not keys:
+            return []
+        try:
+            values = await self._with_pool_retry(lambda: self.client.mget(keys))
+            return [orjson.loads(value) if value else None for value in values]
+        except Exception as e:
+            logger.error(f"Redis mget error: {e}")
+            return [None] * len(keys)
+    
+    async def mset_ex(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None
+    ) -> bool:
+        """Set many values with a TTL in a single pipelined round trip"""
+        if not items:
+            return True
+        try:
+            ttl = ttl or settings.REDIS_TTL
+            encoded = {key: _encode(value) for key, value in items.items()}
+            
+            async def write():
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for key, data in encoded.items():
+                        pipe.setex(key, ttl, data)
+                    await pipe.execute()
+            
+            await self._with_pool_retry(write)
+            return True
+        except Exception as e:
+            logger.error(f"Redis mset error: {e}")
+            return False
+    
+    async def wait_for_key(
+        self,
+        key: str,
+        timeout: float,
+        poll_interval: float = 0.1
+    ) -> Optional[Any]:
+        """Wait for a key to be written, waking on a PUBLISH to the channel of the same name.
+        
+        The key is re-read every poll_interval as well, so producers that only SET it
+        are still picked up; today's producers don't PUBLISH yet, so keep it short
+        """
+        deadline = time.monotonic() + timeout
+        # Subscribe before the first read so a write in between can't be missed;
+        # without a subscription the wait degrades to plain polling
+        try:
+            published = await self._key_waiter.register(key)
+        except Exception as e:
+            logger.error(f"Redis subscribe error, polling instead: {e}")
+            published = None
+        try:
+            while True:
+                value = await self.get(key)
+                if value:
+                    return value
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                if published is None:
+                    await asyncio.sleep(min(poll_interval, remaining))
+                    continue
+                await asyncio.wait({published}, timeout=min(poll_interval, remaining))
+                if published.done():
+                    data = published.result()
+                    try:
+                        return orjson.loads(data)
+                    except orjson.JSONDecodeError:
+                        return data
+        finally:
+            if published is not None:
+                self._key_waiter.unregister(key, published)
+    
+    async def aclose(self):
+        """Close the shared subscriber and the connection pools"""
+        await self._key_waiter.aclose()
+        for client in (self.cache, self.queue, self.health):
+            await client.aclose()
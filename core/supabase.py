@@ -2,16 +2,20 @@
 """
 Supabase client initialization
 """
+from functools import cache
 from supabase import create_client, Client
 from config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    settings.SUPABASE_URL,
-    settings.SUPABASE_KEY
-)
 
-logger.info("Supabase client initialized")
\ No newline at end of file
+@cache
+def get_supabase() -> Client:
+    """Create the Supabase client on first use"""
+    client = create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY
+    )
+    logger.info("Supabase client initialized")
+    return client
@@ -7,7 +7,15 @@ from typing import List, Optional
 from domains.enums import ConfidenceLevel, WorkType, TopicType, IntentType
 
 
-@dataclass
+# Enum member -> raw value lookups, built once at import
+_WORK_TYPE_VALUE = {wt: wt.value for wt in WorkType}
+_WORK_TYPE_VALUE[None] = None
+_CONFIDENCE_VALUE = {c: c.value for c in ConfidenceLevel}
+_TOPIC_VALUE = {t: t.value for t in TopicType}
+_INTENT_VALUE = {i: i.value for i in IntentType}
+
+
+@dataclass(slots=True)
 class WorkClassification:
     """Work vs Non-Work classification entity"""
     is_work: bool
@@ -19,14 +27,14 @@ class WorkClassification:
     def to_dict(self) -> dict:
         return {
             "is_work": self.is_work,
-            "work_type": self.work_type.value if self.work_type else None,
-            "confidence": self.confidence.value,
+            "work_type": _WORK_TYPE_VALUE[self.work_type],
+            "confidence": _CONFIDENCE_VALUE[self.confidence],
             "reasoning": self.reasoning,
             "signals": self.signals
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class TopicClassification:
     """Topic classification entity"""
     primary_topic: TopicType
@@ -36,14 +44,14 @@ class TopicClassification:
     
     def to_dict(self) -> dict:
         return {
-            "primary_topic": self.primary_topic.value,
+            "primary_topic": _TOPIC_VALUE[self.primary_topic],
             "sub_topics": self.sub_topics,
-            "confidence": self.confidence.value,
+            "confidence": _CONFIDENCE_VALUE[self.confidence],
             "keywords": self.keywords
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class IntentClassification:
     """Intent classification entity"""
     primary_intent: IntentType
@@ -53,8 +61,8 @@ class IntentClassification:
     
     def to_dict(self) -> dict:
         return {
-            "primary_intent": self.primary_intent.value,
+            "primary_intent": _INTENT_VALUE[self.primary_intent],
             "detailed_intent": self.detailed_intent,
-            "confidence": self.confidence.value,
+            "confidence": _CONFIDENCE_VALUE[self.confidence],
             "used_assistant_response": self.used_assistant_response
-        }
\ No newline at end of file
+        }
@@ -5,45 +5,16 @@ Enrichment domain entities
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List, Dict
-from domains.enums import (
-    ConfidenceLevel,
-    QualityLevel,
-    RiskLevel,
-    WorkType,
-    TopicType,
-    IntentType
+import orjson
+from domains.enums import QualityLevel, RiskLevel
+from .classification_entities import (
+    WorkClassification,
+    TopicClassification,
+    IntentClassification
 )
 
 
-@dataclass
-class WorkClassification:
-    """Work vs Non-Work classification"""
-    is_work: bool
-    work_type: Optional[WorkType]
-    confidence: ConfidenceLevel
-    reasoning: str
-    signals: List[str]
-
-
-@dataclass
-class TopicClassification:
-    """Topic classification"""
-    primary_topic: TopicType
-    sub_topics: List[str]
-    confidence: ConfidenceLevel
-    keywords: List[str]
-
-
-@dataclass
-class IntentClassification:
-    """Intent classification"""
-    primary_intent: IntentType
-    detailed_intent: str
-    confidence: ConfidenceLevel
-    used_assistant_response: bool
-
-
-@dataclass
+@dataclass(slots=True)
 class QualityAnalysis:
     """Quality analysis of the prompt"""
     overall_score: float  # 0-10
@@ -68,7 +39,7 @@ class QualityAnalysis:
     improvement_suggestions: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class PIIDetection:
     """PII detection results"""
     has_pii: bool
@@ -78,7 +49,7 @@ class PIIDetection:
     redacted_content: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EnrichmentResult:
     """Complete enrichment result"""
     message_id: str
@@ -102,3 +73,6 @@ class EnrichmentResult:
     model_used: str
     cache_hit: bool = False
 
+    def to_json(self) -> bytes:
+        """Encode straight to JSON; orjson walks the nested dataclasses and enums natively"""
+        return orjson.dumps(self)
@@ -10,35 +10,61 @@ class QualityLevel(str, Enum):
     GOOD = "good"
     AVERAGE = "average"
     POOR = "poor"
-    
+
     @classmethod
     def from_score(cls, score: float) -> 'QualityLevel':
         """Get quality level from numeric score"""
-        if score >= 8:
-            return cls.EXCELLENT
-        elif score >= 6:
-            return cls.GOOD
-        elif score >= 4:
-            return cls.AVERAGE
-        else:
-            return cls.POOR
+        for threshold, level in _QUALITY_BUCKETS:
+            if score >= threshold:
+                return level
+        return cls.POOR
 
 
 class RiskLevel(str, Enum):
-    CRITICAL = "critical"
-    HIGH = "high"
-    MEDIUM = "medium"
-    LOW = "low"
-    NONE = "none"
-    
+    CRITICAL = ("critical", 5)
+    HIGH = ("high", 4)
+    MEDIUM = ("medium", 3)
+    LOW = ("low", 2)
+    NONE = ("none", 1)
+
+    def __new__(cls, value: str, priority: int):
+        member = str.__new__(cls, value)
+        member._value_ = value
+        # Plain int on the member so comparisons skip the property/dict lookup
+        member._priority = priority
+        return member
+
     @property
     def priority(self) -> int:
         """Get numeric priority for comparison"""
-        priorities = {
-            self.CRITICAL: 5,
-            self.HIGH: 4,
-            self.MEDIUM: 3,
-            self.LOW: 2,
-            self.NONE: 1
-        }
-        return priorities[self]
\ No newline at end of file
+        return self._priority
+
+    # Order by priority (NONE < ... < CRITICAL) instead of the string value
+    def __lt__(self, other: 'RiskLevel') -> bool:
+        if isinstance(other, RiskLevel):
+            return self._priority < other._priority
+        return NotImplemented
+
+    def __le__(self, other: 'RiskLevel') -> bool:
+        if isinstance(other, RiskLevel):
+            return self._priority <= other._priority
+        return NotImplemented
+
+    def __gt__(self, other: 'RiskLevel') -> bool:
+        if isinstance(other, RiskLevel):
+            return self._priority > other._priority
+        return NotImplemented
+
+    def __ge__(self, other: 'RiskLevel') -> bool:
+        if isinstance(other, RiskLevel):
+            return self._priority >= other._priority
+        return NotImplemented
+
+
+# Lookup tables built once at import
+_QUALITY_BUCKETS = (
+    (8, QualityLevel.EXCELLENT),
+    (6, QualityLevel.GOOD),
+    (4, QualityLevel.AVERAGE),
+)
+
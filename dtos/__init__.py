@@ -13,7 +13,11 @@ from .classification_dto import (
     TopicClassificationDTO,
     IntentClassificationDTO,
     QualityAnalysisDTO,
-    PIIDetectionDTO
+    PIIDetectionDTO,
+    WorkClassificationTD,
+    TopicClassificationTD,
+    IntentClassificationTD,
+    ClassificationTD
 )
 from .chat_enrichment_dto import (
     ChatEnrichmentRequest,
@@ -37,6 +41,10 @@ __all__ = [
     "IntentClassificationDTO",
     "QualityAnalysisDTO",
     "PIIDetectionDTO",
+    "WorkClassificationTD",
+    "TopicClassificationTD",
+    "IntentClassificationTD",
+    "ClassificationTD",
     # Simple chat enrichment / PII detection
     "ChatEnrichmentRequest",
     "ChatEnrichmentResponse",
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, Dict, Tuple
 
 
 class ChatEnrichmentRequest(BaseModel):
@@ -23,9 +23,11 @@ class PIIDetectRequest(BaseModel):
 
 
 class PIIDetectResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     has_pii: bool
-    pii_types: list
+    pii_types: Tuple[str, ...] = ()
     risk_level: str
-    entities: list
+    entities: Tuple[Dict, ...] = ()
     redacted_content: Optional[str] = None
     detector: Optional[str] = None
@@ -2,9 +2,42 @@
 """
 Classification-specific DTOs
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
+# pydantic needs typing_extensions.TypedDict before Python 3.12
+from typing_extensions import TypedDict
 from domains.enums import ConfidenceLevel, QualityLevel, RiskLevel
+from .examples import example
+
+
+# Plain-dict shapes produced by ClassificationService; pydantic validates
+# these as dicts without building nested model instances
+class WorkClassificationTD(TypedDict, total=False):
+    is_work: bool
+    work_type: Optional[str]
+    confidence: str
+    reasoning: str
+    signals: List[str]
+
+
+class TopicClassificationTD(TypedDict, total=False):
+    primary: str
+    sub_topics: List[str]
+    confidence: str
+    keywords: List[str]
+
+
+class IntentClassificationTD(TypedDict, total=False):
+    primary: str
+    detailed: str
+    confidence: str
+    used_assistant_response: bool
+
+
+class ClassificationTD(TypedDict):
+    work: WorkClassificationTD
+    topic: TopicClassificationTD
+    intent: IntentClassificationTD
 
 
 class WorkClassificationDTO(BaseModel):
@@ -15,16 +48,7 @@ class WorkClassificationDTO(BaseModel):
     reasoning: str
     signals: List[str] = Field(default_factory=list)
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "is_work": True,
-                "work_type": "email",
-                "confidence": "high",
-                "reasoning": "Professional email composition",
-                "signals": ["formal tone", "business context"]
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=example("work_classification"))
 
 
 class TopicClassificationDTO(BaseModel):
@@ -68,4 +92,4 @@ class PIIDetectionDTO(BaseModel):
     pii_types: List[str] = Field(default_factory=list)
     risk_level: str
     entities: List[dict] = Field(default_factory=list)
-    redacted_content: Optional[str] = None
\ No newline at end of file
+    redacted_content: Optional[str] = None
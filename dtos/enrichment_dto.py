@@ -2,9 +2,28 @@
 """
 Enrichment DTOs - Complete file
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, root_validator, validator
 from typing import Optional, List, Dict, Any
+from dataclasses import dataclass, fields
 from datetime import datetime
+from .examples import example
+from utils.cache_helpers import stable_batch_id
+from .classification_dto import (
+    WorkClassificationTD,
+    TopicClassificationTD,
+    IntentClassificationTD
+)
+
+
+# Validation constants built once at import
+_VALID_PRIORITIES = frozenset({"low", "normal", "high"})
+_WEBHOOK_PREFIXES = ("http://", "https://")
+
+
+def _check_priority(v: str) -> str:
+    if v not in _VALID_PRIORITIES:
+        raise ValueError("Priority must be one of: low, normal, high")
+    return v
 
 
 class EnrichmentRequestDTO(BaseModel):
@@ -12,7 +31,8 @@ class EnrichmentRequestDTO(BaseModel):
     message_id: str
     user_id: str
     organization_id: str
-    content: str
+    # Length limits are enforced by pydantic-core, before any Python validator runs
+    content: str = Field(..., min_length=1, max_length=100000)
     role: str = "user"
     
     # Optional context
@@ -22,30 +42,31 @@ class EnrichmentRequestDTO(BaseModel):
     conversation_history: Optional[List[Dict]] = None
     
     # Processing options
-    priority: str = Field(default="normal", pattern="^(low|normal|high)$")
+    priority: str = "normal"
     wait_for_response: bool = True
     include_pii_detection: bool = True
     include_quality_analysis: bool = True
     
     @validator('content')
     def validate_content(cls, v):
-        if not v or len(v.strip()) < 1:
+        if v.isspace():
             raise ValueError("Content cannot be empty")
-        if len(v) > 100000:  # 100k char limit
-            raise ValueError("Content exceeds maximum length")
         return v
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "message_id": "msg_123",
-                "user_id": "user_456",
-                "organization_id": "org_789",
-                "content": "Can you help me write a business proposal?",
-                "role": "user",
-                "priority": "normal"
-            }
-        }
+    @validator('priority')
+    def validate_priority(cls, v):
+        return _check_priority(v)
+    
+    @classmethod
+    def validate_many(cls, items: List[Dict[str, Any]]) -> List["EnrichmentRequestDTO"]:
+        """Validate a list of raw requests in one call through a cached adapter"""
+        return _REQUESTS_ADAPTER.validate_python(items)
+    
+    model_config = ConfigDict(json_schema_extra=example("enrichment_request"))
+
+
+# Built once; TypeAdapter construction compiles a new validator each time
+_REQUESTS_ADAPTER = TypeAdapter(List[EnrichmentRequestDTO])
 
 
 class EnrichmentResponseDTO(BaseModel):
@@ -62,46 +83,38 @@ class EnrichmentResponseDTO(BaseModel):
     # Error (when failed)
     error: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "job_id": "job_abc123",
-                "status": "completed",
-                "message_id": "msg_123",
-                "result": {
-                    "work_classification": {
-                        "is_work": True,
-                        "confidence": "high"
-                    },
-                    "topic_classification": {
-                        "primary_topic": "WRITING",
-                        "confidence": "high"
-                    }
-                },
-                "processing_time_ms": 1234.5,
-                "cache_hit": False
-            }
-        }
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "EnrichmentResponseDTO":
+        """Build from data this service produced itself, skipping validation.
+        
+        Only for internal results (cache hits, freshly built results) - request
+        payloads must keep going through normal validation.
+        """
+        return cls.model_construct(**data)
+    
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra=example("enrichment_response")
+    )
 
 
 class BatchEnrichmentRequestDTO(BaseModel):
     """Request for batch message enrichment"""
     batch_id: Optional[str] = Field(
         None, 
-        description="Optional batch ID for tracking"
+        description="Optional batch ID for tracking (derived from the message IDs when omitted)"
     )
     organization_id: str
     messages: List[EnrichmentRequestDTO] = Field(
         ..., 
-        min_items=1,
-        max_items=100,
+        min_length=1,
+        max_length=100,
         description="List of messages to enrich"
     )
     
     # Batch processing options
     priority: str = Field(
         default="normal", 
-        pattern="^(low|normal|high)$",
         description="Priority for the entire batch"
     )
     parallel_processing: bool = Field(
@@ -112,6 +125,12 @@ class BatchEnrichmentRequestDTO(BaseModel):
         default=False,
         description="Stop on first error"
     )
+    max_concurrent: Optional[int] = Field(
+        None,
+        ge=1,
+        le=100,
+        description="Messages enriched at once in parallel mode (defaults to BATCH_MAX_CONCURRENCY)"
+    )
     
     # Optimization options
     share_context: bool = Field(
@@ -135,45 +154,50 @@ class BatchEnrichmentRequestDTO(BaseModel):
     
     @validator('messages')
     def validate_messages(cls, v):
-        if len(v) > 100:
-            raise ValueError("Maximum 100 messages per batch")
+        # Batch size limits are enforced by the field constraints
         
-        # Check for duplicate message IDs
-        message_ids = [msg.message_id for msg in v]
-        if len(message_ids) != len(set(message_ids)):
-            raise ValueError("Duplicate message IDs found in batch")
+        # Check for duplicate message IDs in a single pass
+        seen = set()
+        for msg in v:
+            if msg.message_id in seen:
+                raise ValueError("Duplicate message IDs found in batch")
+            seen.add(msg.message_id)
         
         return v
     
+    @validator('priority')
+    def validate_priority(cls, v):
+        return _check_priority(v)
+    
+    def group_by_conversation(
+        self,
+        messages: Optional[List[EnrichmentRequestDTO]] = None
+    ) -> Dict[str, List[EnrichmentRequestDTO]]:
+        """Group messages (the whole batch by default) by conversation ID"""
+        groups: Dict[str, List[EnrichmentRequestDTO]] = {}
+        for msg in self.messages if messages is None else messages:
+            groups.setdefault(msg.conversation_id or msg.message_id, []).append(msg)
+        
+        # Sort messages within each conversation by message_id (assuming chronological)
+        for group in groups.values():
+            group.sort(key=lambda m: m.message_id)
+        
+        return groups
+    
     @validator('webhook_url')
     def validate_webhook_url(cls, v):
-        if v and not (v.startswith('http://') or v.startswith('https://')):
+        if v and not v.startswith(_WEBHOOK_PREFIXES):
             raise ValueError("Webhook URL must be a valid HTTP/HTTPS URL")
         return v
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "organization_id": "org_123",
-                "messages": [
-                    {
-                        "message_id": "msg_1",
-                        "user_id": "user_1",
-                        "organization_id": "org_123",
-                        "content": "Can you help me write a business proposal?"
-                    },
-                    {
-                        "message_id": "msg_2",
-                        "user_id": "user_1",
-                        "organization_id": "org_123",
-                        "content": "What's the weather today?"
-                    }
-                ],
-                "priority": "normal",
-                "parallel_processing": True,
-                "webhook_url": "https://api.example.com/webhook/enrichment"
-            }
-        }
+    @root_validator(skip_on_failure=True)
+    def default_batch_id(cls, values):
+        # Same messages -> same ID on every replica, so retries map to one batch
+        if not values.get("batch_id"):
+            values["batch_id"] = stable_batch_id(values["messages"])
+        return values
+    
+    model_config = ConfigDict(json_schema_extra=example("batch_enrichment_request"))
 
 
 class BatchEnrichmentResponseDTO(BaseModel):
@@ -204,37 +228,11 @@ class BatchEnrichmentResponseDTO(BaseModel):
     cache_hits: int = 0
     cache_misses: int = 0
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "batch_id": "batch_abc123",
-                "status": "completed",
-                "organization_id": "org_123",
-                "total_messages": 2,
-                "processed_messages": 2,
-                "successful_messages": 2,
-                "failed_messages": 0,
-                "results": [
-                    {
-                        "job_id": "job_1",
-                        "status": "completed",
-                        "message_id": "msg_1",
-                        "cache_hit": False
-                    },
-                    {
-                        "job_id": "job_2",
-                        "status": "completed",
-                        "message_id": "msg_2",
-                        "cache_hit": True
-                    }
-                ],
-                "cache_hits": 1,
-                "cache_misses": 1,
-                "started_at": "2024-01-15T10:00:00Z",
-                "completed_at": "2024-01-15T10:00:05Z",
-                "processing_time_ms": 5000
-            }
-        }
+    # Progress counters are updated in place while the batch runs
+    model_config = ConfigDict(
+        validate_assignment=False,
+        json_schema_extra=example("batch_enrichment_response")
+    )
 
 
 class BatchStatusRequestDTO(BaseModel):
@@ -246,8 +244,9 @@ class BatchStatusRequestDTO(BaseModel):
     )
 
 
-class EnrichmentStatsDTO(BaseModel):
-    """Statistics for enrichment operations"""
+@dataclass(slots=True, frozen=True)
+class EnrichmentStatsDTO:
+    """Statistics for enrichment operations (built server-side only, so no validation)"""
     organization_id: str
     period_start: datetime
     period_end: datetime
@@ -280,35 +279,12 @@ class EnrichmentStatsDTO(BaseModel):
     cache_hit_rate: float
     error_rate: float
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "organization_id": "org_123",
-                "period_start": "2024-01-01T00:00:00Z",
-                "period_end": "2024-01-31T23:59:59Z",
-                "total_messages": 10000,
-                "unique_users": 150,
-                "unique_conversations": 2500,
-                "work_messages": 7500,
-                "non_work_messages": 2500,
-                "work_percentage": 75.0,
-                "topic_distribution": {
-                    "WRITING": 3000,
-                    "ANALYSIS": 2000,
-                    "TECHNICAL": 2500,
-                    "PERSONAL": 2500
-                },
-                "avg_quality_score": 7.2,
-                "high_quality_percentage": 65.0,
-                "needs_clarification_percentage": 15.0,
-                "messages_with_pii": 1200,
-                "pii_percentage": 12.0,
-                "pii_types_found": ["email", "phone", "person_name"],
-                "avg_processing_time_ms": 1500.0,
-                "cache_hit_rate": 0.35,
-                "error_rate": 0.02
-            }
-        }
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict for the response boundary (orjson also encodes the dataclass directly)"""
+        return {name: getattr(self, name) for name in _STATS_FIELDS}
+
+
+_STATS_FIELDS = tuple(f.name for f in fields(EnrichmentStatsDTO))
 
 
 class EnrichmentResultDTO(BaseModel):
@@ -320,9 +296,9 @@ class EnrichmentResultDTO(BaseModel):
     processing_time_ms: float
     
     # Classifications
-    work_classification: Dict[str, Any]
-    topic_classification: Dict[str, Any] 
-    intent_classification: Dict[str, Any]
+    work_classification: WorkClassificationTD
+    topic_classification: TopicClassificationTD
+    intent_classification: IntentClassificationTD
     
     # Analysis
     quality_analysis: Optional[Dict[str, Any]] = None
@@ -334,57 +310,17 @@ class EnrichmentResultDTO(BaseModel):
     model_used: str
     cache_hit: bool = False
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "message_id": "msg_123",
-                "user_id": "user_456",
-                "organization_id": "org_789",
-                "enriched_at": "2024-01-15T10:00:00Z",
-                "processing_time_ms": 1234.5,
-                "work_classification": {
-                    "is_work": True,
-                    "work_type": "email",
-                    "confidence": "high",
-                    "reasoning": "Professional email composition",
-                    "signals": ["formal tone", "business context"]
-                },
-                "topic_classification": {
-                    "primary": "WRITING",
-                    "sub_topics": ["business", "proposal"],
-                    "confidence": "high",
-                    "keywords": ["proposal", "business", "client"]
-                },
-                "intent_classification": {
-                    "primary": "DOING",
-                    "detailed": "doing_creation",
-                    "confidence": "high",
-                    "used_assistant_response": False
-                },
-                "quality_analysis": {
-                    "overall_score": 7.5,
-                    "quality_level": "good",
-                    "has_clear_role": False,
-                    "has_context": True,
-                    "has_clear_goal": True,
-                    "clarity_score": 8.0,
-                    "specificity_score": 7.0,
-                    "completeness_score": 7.5,
-                    "needs_clarification": False,
-                    "ambiguity_level": "low",
-                    "missing_elements": ["role definition"],
-                    "improvement_suggestions": ["Define the AI's role explicitly"]
-                },
-                "pii_detection": {
-                    "has_pii": False,
-                    "pii_types": [],
-                    "risk_level": "none",
-                    "entities": [],
-                    "redacted_content": None
-                },
-                "overall_confidence": 0.85,
-                "used_assistant_response": False,
-                "model_used": "gpt-4.1-nano",
-                "cache_hit": False
-            }
-        }
+    @classmethod
+    def from_trusted(cls, row: Dict[str, Any]) -> "EnrichmentResultDTO":
+        """Rehydrate a stored row without validation.
+        
+        Rows in message_enrichments were validated when this service wrote them,
+        so they are trusted; never use this on client input. Values keep their
+        stored types (e.g. ``enriched_at`` stays an ISO string).
+        """
+        return cls.model_construct(**row)
+    
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra=example("enrichment_result")
+    )
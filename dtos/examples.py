@@ -0,0 +1,23 @@
+# dtos/examples.py
+"""
+OpenAPI examples for the DTOs, kept in examples.json and only read when a
+schema is actually generated (never on the request path)
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict
+import orjson
+
+_EXAMPLES_PATH = Path(__file__).with_name("examples.json")
+
+
+@lru_cache(maxsize=1)
+def _load_examples() -> Dict[str, Any]:
+    return orjson.loads(_EXAMPLES_PATH.read_bytes())
+
+
+def example(name: str) -> Callable[[Dict[str, Any], type], None]:
+    """json_schema_extra hook that attaches the named example to the schema"""
+    def _attach(schema: Dict[str, Any], model: type) -> None:
+        schema["example"] = _load_examples()[name]
+    return _attach
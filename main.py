@@ -3,20 +3,53 @@
 Enrichment Service Main Application
 """
 from contextlib import asynccontextmanager
+import asyncio
+import time
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from config import settings
 from routes import router as api_router
-from core import redis_client, pubsub_client, supabase
-from utils.monitoring import setup_monitoring
+import core
+from core import close_clients
+from dtos import (
+    EnrichmentRequestDTO,
+    BatchEnrichmentRequestDTO,
+    EnrichmentResponseDTO,
+    EnrichmentResultDTO,
+    ChatEnrichmentRequest,
+    PIIDetectRequest
+)
+from routes.health import refresh_health
+from services import get_enrichment_service
+from services.warmup import warm_up
+from utils.monitoring import setup_monitoring, shutdown_monitoring
 
 # Setup logging
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 
+def _warm_up_models() -> None:
+    """Build DTO validators/serializers before traffic so the first request doesn't pay for it"""
+    start = time.perf_counter()
+    for model in (
+        EnrichmentRequestDTO,
+        BatchEnrichmentRequestDTO,
+        EnrichmentResponseDTO,
+        EnrichmentResultDTO,
+        ChatEnrichmentRequest,
+        PIIDetectRequest
+    ):
+        model.__pydantic_validator__
+        model.__pydantic_serializer__
+    # Exercise the cached batch adapter once
+    EnrichmentRequestDTO.validate_many([])
+    logger.info("DTO validators ready in %.1fms", (time.perf_counter() - start) * 1000)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle application lifespan events"""
@@ -27,9 +60,27 @@ async def lifespan(app: FastAPI):
         # Initialize monitoring
         setup_monitoring()
         
-        # Test connections
-        await redis_client.get("health_check")
-        logger.info("✅ Redis connection verified")
+        _warm_up_models()
+        
+        # Prompts, shared services and the LLM connection; failures only cost first-request latency
+        try:
+            await warm_up()
+        except Exception as e:
+            logger.warning(f"Warm-up failed: {e}")
+        
+        # Bounded slots for background batch enrichment (see routes.enrichment.background)
+        app.state.batch_sem = asyncio.Semaphore(settings.MAX_CONCURRENT_BATCHES)
+        app.state.inflight = set()
+        
+        # Test connections; an unreachable Redis shows up as degraded on /health and /ready
+        try:
+            await core.redis_client.ping()
+            logger.info("✅ Redis connection verified")
+        except Exception as e:
+            logger.warning(f"Redis unavailable at startup, continuing degraded: {e}")
+        
+        # /health serves the result of this loop instead of probing per request
+        app.state.health_task = asyncio.create_task(refresh_health(app))
         
         # Start background worker if in worker mode
         if settings.SERVICE_MODE == "worker":
@@ -46,6 +97,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Enrichment Service")
+    app.state.health_task.cancel()
+    if app.state.inflight:
+        logger.info(f"Waiting for {len(app.state.inflight)} background batches")
+        await asyncio.wait(app.state.inflight, timeout=30)
+    # Cache/DB writes that enrich_message left running in the background, then the webhook client
+    await get_enrichment_service().aclose()
+    await close_clients()
+    shutdown_monitoring()
 
 
 # Create FastAPI application
@@ -53,16 +112,20 @@ app = FastAPI(
     title="Jaydai Enrichment Service",
     description="Message enrichment with AI classification and analysis",
     version=settings.APP_VERSION,
-    lifespan=lifespan
+    lifespan=lifespan,
+    openapi_url="/openapi.json" if settings.ENABLE_OPENAPI else None,
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure based on environment
+    allow_origins=settings.CORS_ORIGINS,
+    allow_origin_regex=settings.CORS_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    max_age=settings.CORS_MAX_AGE
 )
 
 # Include routes
@@ -71,4 +134,4 @@ app.include_router(api_router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
@@ -1,8 +1,25 @@
 # repositories/__init__.py
-from .message_repository import MessageRepository
-from .enrichment_repository import EnrichmentRepository
-from .cache_repository import CacheRepository
-from .enriched_chats_repository import EnrichedChatsRepository
+from importlib import import_module
+from typing import Any
+
+# Repositories are imported on first access (PEP 562) so importing the
+# package doesn't pull in every client they depend on
+_REPOSITORIES = {
+    "MessageRepository": ".message_repository",
+    "EnrichmentRepository": ".enrichment_repository",
+    "CacheRepository": ".cache_repository",
+    "EnrichedChatsRepository": ".enriched_chats_repository",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _REPOSITORIES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    repository = getattr(import_module(_REPOSITORIES[name], __name__), name)
+    globals()[name] = repository
+    return repository
+
 
 __all__ = [
     "MessageRepository",
@@ -2,9 +2,9 @@
 """
 Cache repository using Redis
 """
-from typing import Optional, Any
-import json
-from core import redis_client
+from typing import Optional, Any, Dict, List
+from pydantic import BaseModel
+import core
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,7 +14,7 @@ class CacheRepository:
     """Repository for cache operations"""
     
     def __init__(self):
-        self.client = redis_client
+        self.client = core.redis_client
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
@@ -27,12 +27,35 @@ class CacheRepository:
         ttl: Optional[int] = None
     ) -> bool:
         """Set value in cache"""
+        if isinstance(value, BaseModel):
+            # Straight to JSON bytes via pydantic-core, skipping the model_dump() dict
+            value = value.__pydantic_serializer__.to_json(value)
         return await self.client.set(key, value, ttl)
     
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get many values in one round trip (None for misses)"""
+        return await self.client.mget(keys)
+    
+    async def mset(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None
+    ) -> bool:
+        """Set many values with a TTL in one pipelined round trip"""
+        items = {
+            key: value.__pydantic_serializer__.to_json(value) if isinstance(value, BaseModel) else value
+            for key, value in items.items()
+        }
+        return await self.client.mset_ex(items, ttl)
+    
+    async def wait_for(self, key: str, timeout: float) -> Optional[Any]:
+        """Block until the key is published/written or the timeout passes"""
+        return await self.client.wait_for_key(key, timeout)
+    
     async def delete(self, key: str) -> bool:
         """Delete key from cache"""
         try:
-            return bool(self.client.client.delete(key))
+            return bool(await self.client.client.delete(key))
         except Exception as e:
             logger.error(f"Error deleting cache key {key}: {e}")
             return False
@@ -40,7 +63,7 @@ class CacheRepository:
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
         try:
-            return bool(self.client.client.exists(key))
+            return bool(await self.client.client.exists(key))
         except Exception as e:
             logger.error(f"Error checking cache key {key}: {e}")
             return False
@@ -48,7 +71,7 @@ class CacheRepository:
     async def increment(self, key: str, amount: int = 1) -> int:
         """Increment a counter"""
         try:
-            return self.client.client.incrby(key, amount)
+            return await self.client.client.incrby(key, amount)
         except Exception as e:
             logger.error(f"Error incrementing {key}: {e}")
             return 0
\ No newline at end of file
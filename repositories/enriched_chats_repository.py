@@ -1,6 +1,7 @@
 """Repository for enriched chats (first message per chat)."""
-from typing import Dict
-from core import supabase
+import asyncio
+from typing import Dict, List
+import core
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,12 +15,23 @@ class EnrichedChatsRepository:
     @classmethod
     async def save(cls, record: Dict) -> bool:
         try:
-            response = (
-                supabase.table(cls.table_name)
-                .upsert(record)
-                .execute()
-            )
+            query = core.supabase.table(cls.table_name).upsert(record)
+            # supabase-py is synchronous; keep the event loop free for concurrent callers
+            response = await asyncio.to_thread(query.execute)
             return bool(response.data)
         except Exception as e:
             logger.error(f"Error saving enriched chat: {e}")
             return False
+
+    @classmethod
+    async def save_many(cls, records: List[Dict]) -> int:
+        """Upsert many records in one multi-row request; returns rows written."""
+        if not records:
+            return 0
+        try:
+            query = core.supabase.table(cls.table_name).upsert(records)
+            response = await asyncio.to_thread(query.execute)
+            return len(response.data or [])
+        except Exception as e:
+            logger.error(f"Error saving {len(records)} enriched chats: {e}")
+            return 0
@@ -2,13 +2,18 @@
 """
 Enrichment repository for storing results
 """
+import asyncio
 from typing import Optional, Dict, List
 from datetime import datetime
-from core import supabase
+import core
+from dtos import EnrichmentResultDTO
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows per upsert request, to stay under PostgREST request-size limits
+_UPSERT_CHUNK_SIZE = 500
+
 
 class EnrichmentRepository:
     """Repository for enrichment results"""
@@ -17,36 +22,44 @@ class EnrichmentRepository:
     async def save(enrichment_result: Dict) -> bool:
         """Save enrichment result to database"""
         try:
-            response = supabase.table("message_enrichments")\
-                .upsert(enrichment_result)\
-                .execute()
+            # supabase-py is synchronous; run the HTTP call off the event loop
+            query = core.supabase.table("message_enrichments")\
+                .upsert(enrichment_result)
+            response = await asyncio.to_thread(query.execute)
             return bool(response.data)
         except Exception as e:
             logger.error(f"Error saving enrichment: {e}")
             return False
     
     @staticmethod
-    async def get_by_message_id(message_id: str) -> Optional[Dict]:
-        """Get enrichment by message ID"""
+    async def get_by_message_id(message_id: str) -> Optional[EnrichmentResultDTO]:
+        """Get enrichment by message ID (trusted row, not re-validated)"""
         try:
-            response = supabase.table("message_enrichments")\
+            query = core.supabase.table("message_enrichments")\
                 .select("*")\
                 .eq("message_id", message_id)\
-                .single()\
-                .execute()
-            return response.data
+                .single()
+            response = await asyncio.to_thread(query.execute)
+            if not response.data:
+                return None
+            return EnrichmentResultDTO.from_trusted(response.data)
         except Exception as e:
             logger.error(f"Error fetching enrichment for {message_id}: {e}")
             return None
     
     @staticmethod
     async def batch_save(enrichments: List[Dict]) -> int:
-        """Save multiple enrichments"""
+        """Save multiple enrichments (chunked upserts issued concurrently)"""
         try:
-            response = supabase.table("message_enrichments")\
-                .upsert(enrichments)\
-                .execute()
-            return len(response.data) if response.data else 0
+            queries = [
+                core.supabase.table("message_enrichments")
+                .upsert(enrichments[i:i + _UPSERT_CHUNK_SIZE])
+                for i in range(0, len(enrichments), _UPSERT_CHUNK_SIZE)
+            ]
+            responses = await asyncio.gather(
+                *(asyncio.to_thread(query.execute) for query in queries)
+            )
+            return sum(len(response.data) for response in responses if response.data)
         except Exception as e:
             logger.error(f"Error batch saving enrichments: {e}")
             return 0
@@ -59,24 +72,31 @@ class EnrichmentRepository:
     ) -> Dict:
         """Get enrichment statistics for an organization"""
         try:
-            response = supabase.table("message_enrichments")\
-                .select("*")\
+            # Only the columns the aggregates need
+            query = core.supabase.table("message_enrichments")\
+                .select("is_work,quality_score")\
                 .eq("organization_id", organization_id)\
                 .gte("created_at", start_date.isoformat())\
-                .lte("created_at", end_date.isoformat())\
-                .execute()
+                .lte("created_at", end_date.isoformat())
+            response = await asyncio.to_thread(query.execute)
             
-            if not response.data:
+            rows = response.data
+            if not rows:
                 return {}
             
-            # Calculate statistics
-            total = len(response.data)
-            work_count = sum(1 for r in response.data if r.get("is_work"))
+            # Calculate statistics in a single pass
+            total = len(rows)
+            work_count = 0
+            quality_sum = 0.0
+            for r in rows:
+                if r.get("is_work"):
+                    work_count += 1
+                quality_sum += r.get("quality_score") or 0
             
             return {
                 "total_messages": total,
-                "work_percentage": (work_count / total * 100) if total > 0 else 0,
-                "avg_quality_score": sum(r.get("quality_score", 0) for r in response.data) / total if total > 0 else 0
+                "work_percentage": work_count / total * 100,
+                "avg_quality_score": quality_sum / total
             }
         except Exception as e:
             logger.error(f"Error fetching org stats: {e}")
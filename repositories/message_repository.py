@@ -4,11 +4,14 @@ Message repository for database operations
 """
 from typing import Optional, List, Dict
 from datetime import datetime
-from core import supabase
+import core
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns needed to rebuild conversation context
+_CONTEXT_COLUMNS = "id,content,role,created_at,parent_message_id"
+
 
 class MessageRepository:
     """Repository for message-related database operations"""
@@ -17,12 +20,14 @@ class MessageRepository:
     async def get_message(message_id: str) -> Optional[Dict]:
         """Get a message by ID"""
         try:
-            response = supabase.table("messages")\
+            response = core.supabase.table("messages")\
                 .select("*")\
                 .eq("id", message_id)\
-                .single()\
+                .limit(1)\
+                .maybe_single()\
                 .execute()
-            return response.data
+            # maybe_single() yields no response instead of raising on zero rows
+            return response.data if response else None
         except Exception as e:
             logger.error(f"Error fetching message {message_id}: {e}")
             return None
@@ -34,8 +39,8 @@ class MessageRepository:
     ) -> List[Dict]:
         """Get messages from a conversation"""
         try:
-            response = supabase.table("messages")\
-                .select("*")\
+            response = core.supabase.table("messages")\
+                .select(_CONTEXT_COLUMNS)\
                 .eq("conversation_id", conversation_id)\
                 .order("created_at", desc=True)\
                 .limit(limit)\
@@ -52,14 +57,15 @@ class MessageRepository:
     ) -> Optional[str]:
         """Get assistant response for a user message"""
         try:
-            response = supabase.table("messages")\
+            response = core.supabase.table("messages")\
                 .select("content")\
                 .eq("conversation_id", conversation_id)\
                 .eq("parent_message_id", parent_message_id)\
                 .eq("role", "assistant")\
-                .single()\
+                .limit(1)\
+                .maybe_single()\
                 .execute()
-            return response.data.get("content") if response.data else None
+            return response.data.get("content") if response and response.data else None
         except Exception as e:
             logger.error(f"Error fetching assistant response: {e}")
             return None
\ No newline at end of file
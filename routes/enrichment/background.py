@@ -0,0 +1,28 @@
+# routes/enrichment/background.py
+"""
+Bounded background execution for deferred enrichment work
+"""
+import asyncio
+from typing import Coroutine
+from fastapi import FastAPI
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_background(app: FastAPI, coro: Coroutine) -> asyncio.Task:
+    """
+    Run `coro` as a task once a slot in `app.state.batch_sem` is free.
+    Tasks are tracked in `app.state.inflight` so shutdown can drain them.
+    """
+    async def _run():
+        async with app.state.batch_sem:
+            try:
+                await coro
+            except Exception as e:
+                logger.error(f"Background enrichment failed: {e}")
+
+    task = asyncio.create_task(_run())
+    app.state.inflight.add(task)
+    task.add_done_callback(app.state.inflight.discard)
+    return task
@@ -1,17 +1,19 @@
-from fastapi import HTTPException
+from fastapi import Depends, HTTPException
 from . import router
 from dtos import PIIDetectRequest, PIIDetectResponse
-from services import PIIService
+from services import PIIService, get_pii_service
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 @router.post("/detect-pii", response_model=PIIDetectResponse)
-async def detect_pii(request: PIIDetectRequest):
+async def detect_pii(
+    request: PIIDetectRequest,
+    service: PIIService = Depends(get_pii_service),
+):
     """Detect PII in a single message using GLiNER + regex."""
     try:
-        service = PIIService()
         result = await service.detect(request.content)
         return PIIDetectResponse(**result)
     except Exception as e:
@@ -3,12 +3,13 @@
 Batch enrichment endpoint
 """
 from typing import List
-from fastapi import HTTPException, BackgroundTasks
+from fastapi import Depends, HTTPException, Request, Response
 from datetime import datetime
 from . import router
+from .background import run_in_background
 from dtos import BatchEnrichmentRequestDTO, BatchEnrichmentResponseDTO
-from services import EnrichmentService
-from core import pubsub_client
+from services import EnrichmentService, get_enrichment_service
+import core
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,7 +18,8 @@ logger = logging.getLogger(__name__)
 @router.post("/enrich/batch", response_model=BatchEnrichmentResponseDTO)
 async def enrich_batch(
     request: BatchEnrichmentRequestDTO,
-    background_tasks: BackgroundTasks
+    http_request: Request,
+    enrichment_service: EnrichmentService = Depends(get_enrichment_service)
 ):
     """
     Enrich multiple messages in batch
@@ -31,22 +33,19 @@ async def enrich_batch(
     - Partial results on failure
     """
     try:
-        enrichment_service = EnrichmentService()
-        
         # For high priority, process immediately
         if request.priority == "high":
             result = await enrichment_service.enrich_batch(request)
-            return result
-        
-        # For normal/low priority, queue for background processing
-        background_tasks.add_task(
-            enrichment_service.enrich_batch,
-            request
-        )
+            # Up to 100 nested results: encode once with pydantic-core
+            # instead of re-validating and walking them through jsonable_encoder
+            return Response(
+                content=result.__pydantic_serializer__.to_json(result),
+                media_type="application/json"
+            )
         
-        # Return immediate response with batch ID
-        return BatchEnrichmentResponseDTO(
-            batch_id=request.batch_id or f"batch_{hash(str(request.messages))}", 
+        # Immediate response with batch ID; stored so status polls resolve right away
+        accepted = BatchEnrichmentResponseDTO(
+            batch_id=request.batch_id,
             status="processing",
             organization_id=request.organization_id,
             total_messages=len(request.messages),
@@ -55,6 +54,28 @@ async def enrich_batch(
             failed_messages=0,
             started_at=datetime.utcnow()
         )
+        await enrichment_service.store_batch_status(accepted)
+        
+        # Low priority goes to the worker fleet as one batch message: the worker runs
+        # enrich_batch, which stores the final status and fires the webhook. A single
+        # publish either lands or fails whole, so the fallback never duplicates work
+        queued = False
+        if request.priority == "low":
+            try:
+                # Inside the try: building the lazy client can fail too (credentials, topic)
+                if core.pubsub_client.publisher:
+                    payload = request.model_dump(mode="json")
+                    payload["type"] = "batch"
+                    await core.pubsub_client.publish(payload)
+                    queued = True
+            except Exception as pub_error:
+                logger.warning(f"Pub/Sub batch publish failed, processing in background: {pub_error}")
+        
+        # For normal priority (or if Pub/Sub is unavailable), process in a bounded background task
+        if not queued:
+            run_in_background(http_request.app, enrichment_service.enrich_batch(request))
+        
+        return accepted
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -66,13 +87,13 @@ async def enrich_batch(
 @router.get("/batch/{batch_id}/status", response_model=BatchEnrichmentResponseDTO)
 async def get_batch_status(
     batch_id: str,
-    include_results: bool = False
+    include_results: bool = False,
+    enrichment_service: EnrichmentService = Depends(get_enrichment_service)
 ):
     """
     Get status of a batch enrichment job
     """
     try:
-        enrichment_service = EnrichmentService()
         result = await enrichment_service.get_batch_status(
             batch_id,
             include_results
@@ -1,7 +1,7 @@
 from fastapi import HTTPException
 from . import router
 from dtos import ChatEnrichmentRequest, ChatEnrichmentResponse
-from services.simple_classification_service import SimpleClassificationService
+from services.simple_classification_service import CHAT_DEFAULTS, SimpleClassificationService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,9 +18,9 @@ async def enrich_chat(request: ChatEnrichmentRequest):
         )
 
         return ChatEnrichmentResponse(
-            is_work_related=bool(result.get("is_work_related", False)),
-            theme=result.get("theme", "non_work"),
-            intent=result.get("intent", "non_work"),
+            is_work_related=bool(result.get("is_work_related", CHAT_DEFAULTS["is_work_related"])),
+            theme=result.get("theme", CHAT_DEFAULTS["theme"]),
+            intent=result.get("intent", CHAT_DEFAULTS["intent"]),
             quality=result.get("quality"),
             feedback=result.get("feedback"),
             raw=result,
@@ -2,11 +2,11 @@
 """
 Message enrichment endpoint
 """
-from fastapi import HTTPException, BackgroundTasks
+from fastapi import Depends, HTTPException, BackgroundTasks
 from . import router
 from dtos import EnrichmentRequestDTO, EnrichmentResponseDTO
-from services import EnrichmentService
-from core import pubsub_client
+from services import EnrichmentService, get_enrichment_service, skip_reason
+import core
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,7 +15,8 @@ logger = logging.getLogger(__name__)
 @router.post("/enrich", response_model=EnrichmentResponseDTO)
 async def enrich_message(
     request: EnrichmentRequestDTO,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    enrichment_service: EnrichmentService = Depends(get_enrichment_service)
 ):
     """
     Enrich a single message
@@ -23,25 +24,25 @@ async def enrich_message(
     """
     try:
         # Quick validation
-        if not request.content or len(request.content) < 10:
+        reason = skip_reason(request.content)
+        if reason is not None:
             return EnrichmentResponseDTO(
                 job_id="skipped",
                 status="skipped",
                 message_id=request.message_id,
-                result={"reason": "Content too short"}
+                result={"reason": reason}
             )
         
-        enrichment_service = EnrichmentService()
-        
         # For high priority or if pub/sub not available, process synchronously
-        if request.priority == "high" or not pubsub_client.publisher:
+        if request.priority == "high" or not core.pubsub_client.publisher:
             result = await enrichment_service.enrich_message(request)
             return result
         
         # For normal/low priority with pub/sub available
         try:
-            message = request.dict()
-            job_id = await pubsub_client.publish(message)
+            # pydantic-core writes JSON bytes in one pass; publish() sends them as-is
+            message = request.__pydantic_serializer__.to_json(request)
+            job_id = await core.pubsub_client.publish(message)
             
             logger.info(f"Enrichment job {job_id} queued for message {request.message_id}")
             
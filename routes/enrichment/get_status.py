@@ -4,7 +4,7 @@ Get enrichment status endpoint
 """
 from fastapi import HTTPException
 from . import router
-from repositories import EnrichmentRepository
+from repositories.enrichment_repository import EnrichmentRepository
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,7 +25,8 @@ async def get_enrichment_status(message_id: str):
         return {
             "message_id": message_id,
             "status": "completed",
-            "result": result
+            # Trusted rows keep DB-native types, so skip type-mismatch warnings
+            "result": result.model_dump(mode="json", warnings=False)
         }
         
     except HTTPException:
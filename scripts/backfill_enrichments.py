@@ -10,6 +10,7 @@ Usage:
 Optional flags:
   --limit N           Limit number of chats (for the enriched-chats pass)
   --batch-size N      Page size when fetching messages (default 500)
+  --concurrency N     Messages enriched concurrently (default 32)
   --mode MODE         one of: both (default) | enriched_chats | pii_only
 """
 
@@ -18,7 +19,7 @@ import argparse
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional
 
 # Ensure project root is on path when running as a script
 ROOT = Path(__file__).resolve().parents[1]
@@ -29,10 +30,45 @@ from core import supabase
 from services.enrichment_service import EnrichmentService
 from services.pii_service import PIIService
 from dtos import EnrichmentRequestDTO
-from repositories import EnrichedChatsRepository
+from repositories import EnrichedChatsRepository, EnrichmentRepository
 from config import settings
 
 
+# Records buffered per multi-row upsert
+FLUSH_SIZE = 200
+
+
+class UpsertBuffer:
+    """Collects records and writes them in multi-row upserts.
+
+    Used as an async context manager so whatever is still buffered is flushed
+    on exit, including when the pass fails part-way.
+    """
+
+    def __init__(self, flush: Callable[[List[Dict]], Awaitable[int]], size: int = FLUSH_SIZE):
+        self._flush = flush
+        self._size = size
+        self._pending: List[Dict] = []
+
+    async def add(self, record: Dict):
+        self._pending.append(record)
+        if len(self._pending) >= self._size:
+            await self.flush()
+
+    async def flush(self):
+        # Swap before awaiting so concurrent add() calls start a fresh buffer
+        records, self._pending = self._pending, []
+        if records:
+            written = await self._flush(records)
+            print(f" -> flushed {written}/{len(records)} records")
+
+    async def __aenter__(self) -> "UpsertBuffer":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.flush()
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Backfill enrichment for first user messages")
     parser.add_argument("--start", required=True, help="Start date (ISO, e.g. 2025-01-01)")
@@ -40,6 +76,12 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--org-id", required=True, help="Organization ID to attribute enrichments")
     parser.add_argument("--limit", type=int, default=None, help="Optional limit on number of chats")
     parser.add_argument("--batch-size", type=int, default=500, help="Page size for Supabase fetches")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=32,
+        help="Messages enriched concurrently (tune to the OpenAI rate limit)"
+    )
     parser.add_argument(
         "--mode",
         choices=["both", "enriched_chats", "pii_only"],
@@ -54,18 +96,25 @@ def fetch_first_user_messages(start: str, end: str, batch_size: int, limit: Opti
 
     seen_chats = set()
     first_messages: List[Dict] = []
-    offset = 0
+    last_chat_id: Optional[str] = None
 
     while True:
-        response = (
+        query = (
             supabase.table("messages")
             .select("*")
             .eq("role", "user")
             .gte("created_at", start)
             .lte("created_at", end)
+        )
+        # Keyset cursor: each page starts after the last chat seen. Its first
+        # message is already collected, so its remaining rows can be skipped.
+        if last_chat_id is not None:
+            query = query.gt("chat_provider_id", last_chat_id)
+        response = (
+            query
             .order("chat_provider_id", desc=False)
             .order("created_at", desc=False)
-            .range(offset, offset + batch_size - 1)
+            .limit(batch_size)
             .execute()
         )
 
@@ -82,67 +131,113 @@ def fetch_first_user_messages(start: str, end: str, batch_size: int, limit: Opti
             if limit and len(first_messages) >= limit:
                 return first_messages
 
-        offset += batch_size
+        last_chat_id = rows[-1].get("chat_provider_id")
+        if last_chat_id is None or len(rows) < batch_size:
+            break
 
     return first_messages
 
 
-def fetch_first_assistant_message(chat_id: str) -> Optional[Dict]:
-    """Fetch the first assistant message for a chat."""
-    response = (
-        supabase.table("messages")
-        .select("*")
-        .eq("chat_provider_id", chat_id)
-        .eq("role", "assistant")
-        .order("created_at", desc=False)
-        .limit(1)
-        .execute()
-    )
-    rows = response.data or []
-    return rows[0] if rows else None
+# Chat ids per in_() filter (keeps the request URL short) and rows per page
+# (PostgREST caps responses, and a chunk of chats can return many replies)
+IN_CHUNK_SIZE = 200
+ASSISTANT_PAGE_SIZE = 1000
+
+
+def fetch_first_assistant_messages(chat_ids: List[str]) -> Dict[str, Dict]:
+    """Fetch the first assistant message for each chat, keyed by chat_provider_id."""
+    first_by_chat: Dict[str, Dict] = {}
+
+    for i in range(0, len(chat_ids), IN_CHUNK_SIZE):
+        chunk = chat_ids[i:i + IN_CHUNK_SIZE]
+        offset = 0
+        while True:
+            response = (
+                supabase.table("messages")
+                .select("chat_provider_id,content,message_provider_id,created_at")
+                .in_("chat_provider_id", chunk)
+                .eq("role", "assistant")
+                .order("chat_provider_id", desc=False)
+                .order("created_at", desc=False)
+                .range(offset, offset + ASSISTANT_PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = response.data or []
+            # Rows are ordered, so the first one seen per chat is its first reply
+            for row in rows:
+                first_by_chat.setdefault(row["chat_provider_id"], row)
+            if len(rows) < ASSISTANT_PAGE_SIZE:
+                break
+            offset += ASSISTANT_PAGE_SIZE
 
+    return first_by_chat
 
-def fetch_user_messages(start: str, end: str, batch_size: int) -> List[Dict]:
-    """Fetch all user messages in date window."""
-    messages: List[Dict] = []
-    offset = 0
+
+async def iter_user_messages(start: str, end: str, batch_size: int) -> AsyncIterator[Dict]:
+    """Yield all user messages in date window, one page in memory at a time."""
+    cursor: Optional[Dict] = None
 
     while True:
-        response = (
+        query = (
             supabase.table("messages")
             .select("*")
             .eq("role", "user")
             .gte("created_at", start)
             .lte("created_at", end)
+        )
+        # Keyset cursor on (created_at, id) so each page is an index range scan, not an OFFSET
+        if cursor is not None:
+            created_at, row_id = cursor["created_at"], cursor["id"]
+            query = query.or_(
+                f'created_at.gt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.gt.{row_id})'
+            )
+        query = (
+            query
             .order("created_at", desc=False)
-            .range(offset, offset + batch_size - 1)
-            .execute()
+            .order("id", desc=False)
+            .limit(batch_size)
         )
+        response = await asyncio.to_thread(query.execute)
 
         rows = response.data or []
-        if not rows:
-            break
-
-        messages.extend(rows)
-        offset += batch_size
-
-    return messages
-
+        for row in rows:
+            yield row
 
-async def enrich_messages(start: str, end: str, org_id: str, limit: Optional[int], batch_size: int):
-    service = EnrichmentService()
+        if len(rows) < batch_size:
+            break
+        cursor = rows[-1]
+
+
+async def enrich_messages(
+    start: str,
+    end: str,
+    org_id: str,
+    limit: Optional[int],
+    batch_size: int,
+    concurrency: int,
+):
+    # Await each save: asyncio.run() would cancel writes still running in the background
+    service = EnrichmentService(persist_in_background=False)
     # Enriched chats: first user message per chat
     user_messages = fetch_first_user_messages(start, end, batch_size, limit)
     print(f"Found {len(user_messages)} chats to enrich (first user message per chat)")
 
-    for idx, msg in enumerate(user_messages, start=1):
+    # One bulk prefetch instead of a round trip per chat inside the loop
+    first_assistant_by_chat = fetch_first_assistant_messages(
+        [msg["chat_provider_id"] for msg in user_messages if msg.get("chat_provider_id")]
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def enrich_one(idx: int, msg: Dict):
         chat_id = msg.get("chat_provider_id")
         content = (msg.get("content") or "").strip()
         if not content:
             print(f"[{idx}/{len(user_messages)}] Skipping chat {chat_id}: empty user content")
-            continue
+            return
 
-        assistant_msg = fetch_first_assistant_message(chat_id) if chat_id else None
+        assistant_msg = first_assistant_by_chat.get(chat_id) if chat_id else None
 
         assistant_response = assistant_msg.get("content") if assistant_msg else None
 
@@ -161,9 +256,11 @@ async def enrich_messages(start: str, end: str, org_id: str, limit: Optional[int
 
         print(f"[{idx}/{len(user_messages)}] Enriching chat {chat_id} message {request.message_id}")
         try:
-            result = await service.enrich_message(request)
+            # Only the LLM-bound enrichment is bounded; saves run as each result lands
+            async with semaphore:
+                result = await service.enrich_message(request)
             status = result.status
-            print(f" -> status={status}, cache_hit={result.cache_hit}")
+            print(f" -> {request.message_id}: status={status}, cache_hit={result.cache_hit}")
 
             # Persist to enriched_chats table
             enriched = result.result or {}
@@ -186,25 +283,33 @@ async def enrich_messages(start: str, end: str, org_id: str, limit: Optional[int
                 "model_used": enriched.get("model_used", getattr(settings, "DEFAULT_MODEL", "gpt-4.1-nano")),
                 "enriched_at": datetime.utcnow().isoformat(),
             }
-            await EnrichedChatsRepository.save(record)
+            await buffer.add(record)
         except Exception as exc:
-            print(f" -> failed: {exc}")
+            print(f" -> {chat_id} failed: {exc}")
+
+    try:
+        async with UpsertBuffer(EnrichedChatsRepository.save_many) as buffer:
+            await asyncio.gather(
+                *(enrich_one(idx, msg) for idx, msg in enumerate(user_messages, start=1))
+            )
+    finally:
+        await service.aclose()
 
 
-async def enrich_pii_only(start: str, end: str, org_id: str, batch_size: int):
+async def enrich_pii_only(start: str, end: str, org_id: str, batch_size: int, concurrency: int):
     pii_service = PIIService()
-    messages = fetch_user_messages(start, end, batch_size)
-    print(f"Found {len(messages)} user messages for PII detection")
+    # Acquired before each task is created, so at most `concurrency` rows are held beyond the current page
+    semaphore = asyncio.Semaphore(concurrency)
 
-    for idx, msg in enumerate(messages, start=1):
+    async def detect_one(idx: int, msg: Dict):
         content = (msg.get("content") or "").strip()
         if not content:
-            print(f"[PII {idx}/{len(messages)}] Skipping message with empty content")
-            continue
+            print(f"[PII {idx}] Skipping message with empty content")
+            return
 
         chat_id = msg.get("chat_provider_id")
 
-        print(f"[PII {idx}/{len(messages)}] Message {msg.get('message_provider_id') or msg.get('id')}")
+        print(f"[PII {idx}] Message {msg.get('message_provider_id') or msg.get('id')}")
         try:
             pii = await pii_service.detect(content)
             record = {
@@ -224,9 +329,22 @@ async def enrich_pii_only(start: str, end: str, org_id: str, batch_size: int):
                 "model_used": getattr(settings, "DEFAULT_MODEL", "gpt-4.1-nano"),
                 "cache_hit": False,
             }
-            supabase.table("message_enrichments").upsert(record).execute()
+            await buffer.add(record)
         except Exception as exc:
-            print(f" -> failed: {exc}")
+            print(f" -> {chat_id} failed: {exc}")
+
+    async with UpsertBuffer(EnrichmentRepository.batch_save) as buffer:
+        pending = set()
+        idx = 0
+        async for msg in iter_user_messages(start, end, batch_size):
+            idx += 1
+            await semaphore.acquire()
+            task = asyncio.create_task(detect_one(idx, msg))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            task.add_done_callback(lambda _: semaphore.release())
+        await asyncio.gather(*pending)
+        print(f"Processed {idx} user messages for PII detection")
 
 
 if __name__ == "__main__":
@@ -246,6 +364,7 @@ if __name__ == "__main__":
                 org_id=args.org_id,
                 limit=args.limit,
                 batch_size=args.batch_size,
+                concurrency=args.concurrency,
             )
 
         if args.mode in ("both", "pii_only"):
@@ -254,6 +373,7 @@ if __name__ == "__main__":
                 end=args.end,
                 org_id=args.org_id,
                 batch_size=args.batch_size,
+                concurrency=args.concurrency,
             )
 
     asyncio.run(main())
@@ -1,12 +1,15 @@
 # services/__init__.py
-from .enrichment_service import EnrichmentService
+from .enrichment_service import EnrichmentService, get_enrichment_service, skip_reason
 from .classification_service import ClassificationService
 from .quality_service import QualityService
-from .pii_service import PIIService
+from .pii_service import PIIService, get_pii_service
 
 __all__ = [
     "EnrichmentService",
+    "get_enrichment_service",
+    "skip_reason",
     "ClassificationService",
     "QualityService",
-    "PIIService"
+    "PIIService",
+    "get_pii_service"
 ]
\ No newline at end of file
@@ -2,21 +2,90 @@
 """
 Classification service with comprehensive logging
 """
+import asyncio
+from types import MappingProxyType
 import json
-from typing import Optional, Dict, List
-from core import llm_client
-from utils import PromptLoader
+import orjson
+from typing import Optional, Dict, List, Tuple
+from config import settings
+import core
+from core.llm import LLMClient
+from dtos import (
+    ClassificationTD,
+    WorkClassificationTD,
+    TopicClassificationTD,
+    IntentClassificationTD
+)
+from utils import PromptLoader, render_template
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+_EMPTY_HISTORY = "No previous messages"
+
+# Read-only fallback returned when classification fails; empty sequences are
+# shared tuples so nothing needs a fresh allocation
+_DEFAULT_CLASSIFICATION = MappingProxyType({
+    "work": MappingProxyType({
+        "is_work": False,
+        "work_type": None,
+        "confidence": "low",
+        "reasoning": "Classification failed",
+        "signals": ()
+    }),
+    "topic": MappingProxyType({
+        "primary": "OTHER",
+        "sub_topics": (),
+        "confidence": "low",
+        "keywords": ()
+    }),
+    "intent": MappingProxyType({
+        "primary": "EXPRESSING",
+        "detailed": "unknown",
+        "confidence": "low",
+        "used_assistant_response": False
+    })
+})
+_ROLE_MAP = {"user": "USER", "assistant": "ASSISTANT", "system": "SYSTEM"}
+
+
+# (key, default) per classification section; empty sequences are shared tuples
+_WORK_SCHEMA = (
+    ("is_work", False),
+    ("work_type", None),
+    ("confidence", "low"),
+    ("reasoning", ""),
+    ("signals", ()),
+)
+_TOPIC_SCHEMA = (
+    ("primary", "OTHER"),
+    ("sub_topics", ()),
+    ("confidence", "low"),
+    ("keywords", ()),
+)
+_INTENT_SCHEMA = (
+    ("primary", "EXPRESSING"),
+    ("detailed", "unknown"),
+    ("confidence", "low"),
+    ("used_assistant_response", False),
+)
+
+
+def _validate(data: Dict, schema: Tuple[Tuple[str, object], ...]) -> Dict:
+    """Keep the schema's keys, filling missing ones with their defaults"""
+    return {key: data.get(key, default) for key, default in schema}
+
+
 class ClassificationService:
     """Service for message classification with detailed logging"""
     
     def __init__(self):
-        self.llm = llm_client
+        self.llm = core.llm_client
         self.prompt_loader = PromptLoader()
+        # Templates are read and parsed once; every call only joins the parts
+        self._prompt_parts = self.prompt_loader.load_compiled("unified_classification.txt")
+        self._batch_prompt_parts = self.prompt_loader.load_compiled("unified_classification_batch.txt")
         logger.info("ClassificationService initialized")
     
     async def classify(
@@ -24,38 +93,31 @@ class ClassificationService:
         content: str,
         assistant_response: Optional[str] = None,
         conversation_history: Optional[List[Dict]] = None
-    ) -> Dict:
+    ) -> ClassificationTD:
         """
-        Perform unified classification with detailed logging
+        Perform unified classification
         """
-        logger.info("\n" + "="*50)
-        logger.info("STARTING CLASSIFICATION")
-        logger.info("="*50)
-        logger.info(f"Content length: {len(content)} chars")
-        logger.info(f"Has assistant response: {bool(assistant_response)}")
-        logger.info(f"Has conversation history: {bool(conversation_history)}")
+        logger.info("classification.start", extra={
+            "content_len": len(content),
+            "has_assistant_response": bool(assistant_response),
+            "has_conversation_history": bool(conversation_history)
+        })
         
         try:
-            # Load prompt template
-            logger.debug("Loading prompt template...")
-            prompt_template = self.prompt_loader.load("unified_classification.txt")
-            logger.debug(f"Prompt template loaded, length: {len(prompt_template)} chars")
-            
             # Format conversation history
             history_text = self._format_history(conversation_history)
-            logger.debug(f"Formatted history: {history_text[:200]}...")
+            logger.debug("Formatted history: %.200s...", history_text)
             
             # Build prompt
-            logger.debug("Building prompt...")
-            prompt = prompt_template.format(
+            prompt = render_template(
+                self._prompt_parts,
                 user_message=content[:2000],
                 assistant_response=assistant_response[:2000] if assistant_response else "Not available",
                 conversation_history=history_text
             )
-            logger.debug(f"Final prompt length: {len(prompt)} chars")
+            logger.debug("Final prompt length: %d chars", len(prompt))
             
             # Call LLM
-            logger.info("Calling LLM for classification...")
             response = await self.llm.complete(
                 system_prompt="You are a message classifier. Analyze the message and return classification results as valid JSON.",
                 user_message=prompt,
@@ -63,137 +125,137 @@ class ClassificationService:
                 max_tokens=500
             )
             
-            logger.info(f"LLM response received, length: {len(response)} chars")
-            logger.debug(f"Raw LLM response:\n{response}")
+            logger.debug("Raw LLM response (%d chars):\n%s", len(response), response)
             
             # Parse response
-            logger.debug("Parsing classification response...")
             result = self._parse_classification(response)
             
-            logger.info("✅ Classification completed successfully")
-            logger.debug(f"Classification result: {json.dumps(result, indent=2)[:500]}")
+            logger.info("classification.done", extra={"response_len": len(response)})
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Classification result: %.500s", orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
             
             return result
             
         except Exception as e:
-            logger.error(f"❌ Classification failed: {str(e)}")
-            logger.error(f"Error type: {type(e).__name__}")
-            import traceback
-            logger.error(f"Traceback:\n{traceback.format_exc()}")
+            logger.exception("Classification failed (%s): %s", type(e).__name__, e)
             return self._get_default_classification()
     
-    def _parse_classification(self, response: str) -> Dict:
-        """Parse LLM response with detailed logging"""
-        logger.debug("="*40)
-        logger.debug("PARSING CLASSIFICATION RESPONSE")
-        logger.debug("="*40)
+    async def classify_many(
+        self,
+        items: List[Tuple[str, Optional[str]]],
+        conversation_history: Optional[List[Dict]] = None
+    ) -> List[ClassificationTD]:
+        """
+        Classify several (content, assistant_response) pairs from one conversation,
+        sending up to BATCH_SIZE messages per LLM call instead of one call each
+        """
+        chunk_size = max(1, settings.BATCH_SIZE)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        history_text = self._format_history(conversation_history)
+        
+        results = await asyncio.gather(
+            *(self._classify_chunk(chunk, conversation_history, history_text) for chunk in chunks)
+        )
+        return [classification for chunk_result in results for classification in chunk_result]
+    
+    async def _classify_chunk(
+        self,
+        items: List[Tuple[str, Optional[str]]],
+        conversation_history: Optional[List[Dict]],
+        history_text: str
+    ) -> List[ClassificationTD]:
+        """Classify one chunk in a single LLM call; falls back to per-message calls"""
+        if len(items) == 1:
+            content, assistant_response = items[0]
+            return [await self.classify(content, assistant_response, conversation_history)]
         
         try:
-            # Log the raw response
-            logger.debug(f"Raw response to parse:\n{response}")
-            
-            # Clean response
-            response = response.strip()
-            logger.debug(f"After strip: {response[:100]}...")
-            
-            # Parse JSON
-            logger.debug("Attempting JSON parse...")
-            data = json.loads(response)
-            logger.debug(f"Successfully parsed JSON")
-            logger.debug(f"JSON keys: {list(data.keys())}")
-            
-            # Extract and validate each component
-            work = data.get("work", {})
-            logger.debug(f"Work classification: {work}")
+            messages_text = "\n\n".join(
+                f"[{i}] User: {content[:2000]}\n"
+                f"[{i}] Assistant: {assistant_response[:2000] if assistant_response else 'Not available'}"
+                for i, (content, assistant_response) in enumerate(items)
+            )
+            prompt = render_template(
+                self._batch_prompt_parts,
+                messages=messages_text,
+                conversation_history=history_text
+            )
             
-            topic = data.get("topic", {})
-            logger.debug(f"Topic classification: {topic}")
+            response = await self.llm.complete(
+                system_prompt="You are a message classifier. Analyze the messages and return classification results as valid JSON.",
+                user_message=prompt,
+                temperature=0.1,
+                max_tokens=400 * len(items)
+            )
             
-            intent = data.get("intent", {})
-            logger.debug(f"Intent classification: {intent}")
+            results = orjson.loads(LLMClient.extract_json(response) or response).get("results")
+            if isinstance(results, list) and len(results) == len(items):
+                return [self._classification_from_data(data) for data in results]
             
-            result = {
-                "work": self._validate_work(work),
-                "topic": self._validate_topic(topic),
-                "intent": self._validate_intent(intent)
-            }
+            logger.warning("Batch classification returned %s results for %d messages, retrying one by one",
+                           len(results) if isinstance(results, list) else "no", len(items))
+        except Exception as e:
+            logger.warning("Batch classification failed, retrying one by one: %s", e)
+        
+        return list(await asyncio.gather(
+            *(
+                self.classify(content, assistant_response, conversation_history)
+                for content, assistant_response in items
+            )
+        ))
+    
+    def _classification_from_data(self, data: Dict) -> ClassificationTD:
+        """Validate the work/topic/intent sections of a parsed classification"""
+        return {
+            "work": self._validate_work(data.get("work", {})),
+            "topic": self._validate_topic(data.get("topic", {})),
+            "intent": self._validate_intent(data.get("intent", {}))
+        }
+    
+    def _parse_classification(self, response: str) -> ClassificationTD:
+        """Parse LLM response into a validated classification"""
+        try:
+            # Parse JSON (orjson.JSONDecodeError subclasses json.JSONDecodeError)
+            data = orjson.loads(LLMClient.extract_json(response) or response)
+            logger.debug("Parsed classification JSON with keys: %s", list(data))
             
-            logger.debug("Classification parsing completed successfully")
-            return result
+            # Extract and validate each component
+            return self._classification_from_data(data)
             
         except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
-            logger.error(f"Error at position: {e.pos if hasattr(e, 'pos') else 'unknown'}")
-            logger.error(f"Failed content:\n{response}")
+            logger.error("JSON decode error at position %s: %s", getattr(e, "pos", "unknown"), e)
+            logger.debug("Failed content:\n%s", response)
             return self._get_default_classification()
         except Exception as e:
-            logger.error(f"Unexpected parsing error: {e}")
-            import traceback
-            logger.error(f"Traceback:\n{traceback.format_exc()}")
+            logger.exception("Unexpected parsing error: %s", e)
             return self._get_default_classification()
     
-    def _validate_work(self, work_data: Dict) -> Dict:
+    def _validate_work(self, work_data: Dict) -> WorkClassificationTD:
         """Validate and fill work classification"""
-        return {
-            "is_work": work_data.get("is_work", False),
-            "work_type": work_data.get("work_type"),
-            "confidence": work_data.get("confidence", "low"),
-            "reasoning": work_data.get("reasoning", ""),
-            "signals": work_data.get("signals", [])
-        }
+        return _validate(work_data, _WORK_SCHEMA)
     
-    def _validate_topic(self, topic_data: Dict) -> Dict:
+    def _validate_topic(self, topic_data: Dict) -> TopicClassificationTD:
         """Validate and fill topic classification"""
-        return {
-            "primary": topic_data.get("primary", "OTHER"),
-            "sub_topics": topic_data.get("sub_topics", []),
-            "confidence": topic_data.get("confidence", "low"),
-            "keywords": topic_data.get("keywords", [])
-        }
+        return _validate(topic_data, _TOPIC_SCHEMA)
     
-    def _validate_intent(self, intent_data: Dict) -> Dict:
+    def _validate_intent(self, intent_data: Dict) -> IntentClassificationTD:
         """Validate and fill intent classification"""
-        return {
-            "primary": intent_data.get("primary", "EXPRESSING"),
-            "detailed": intent_data.get("detailed", "unknown"),
-            "confidence": intent_data.get("confidence", "low"),
-            "used_assistant_response": intent_data.get("used_assistant_response", False)
-        }
+        return _validate(intent_data, _INTENT_SCHEMA)
     
-    def _get_default_classification(self) -> Dict:
+    def _get_default_classification(self) -> ClassificationTD:
         """Get default classification for errors"""
         logger.debug("Returning default classification due to error")
-        return {
-            "work": {
-                "is_work": False,
-                "work_type": None,
-                "confidence": "low",
-                "reasoning": "Classification failed",
-                "signals": []
-            },
-            "topic": {
-                "primary": "OTHER",
-                "sub_topics": [],
-                "confidence": "low",
-                "keywords": []
-            },
-            "intent": {
-                "primary": "EXPRESSING",
-                "detailed": "unknown",
-                "confidence": "low",
-                "used_assistant_response": False
-            }
-        }
+        # Plain dicts (one shallow copy per section) because results are JSON-encoded
+        # and stored; mappingproxy isn't serializable
+        return {key: dict(section) for key, section in _DEFAULT_CLASSIFICATION.items()}
     
     def _format_history(self, history: Optional[List[Dict]]) -> str:
         """Format conversation history"""
         if not history:
-            return "No previous messages"
-        
-        formatted = []
-        for msg in history[-3:]:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")[:200]
-            formatted.append(f"{role.upper()}: {content}")
+            return _EMPTY_HISTORY
         
-        return "\n".join(formatted)
\ No newline at end of file
+        return "\n".join(
+            f"{_ROLE_MAP.get(msg.get('role', 'user')) or msg.get('role', 'user').upper()}: "
+            f"{(msg.get('content') or '')[:200]}"
+            for msg in history[-3:]
+        )
\ No newline at end of file
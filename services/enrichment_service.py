@@ -3,11 +3,14 @@
 Main enrichment service with batch processing
 """
 import asyncio
-import hashlib
 import json
+import time
 from datetime import datetime
-from typing import Optional, Dict, List, Set
+from functools import lru_cache
+from typing import Optional, Dict, List, Set, Tuple
 from uuid import uuid4
+import httpx
+import xxhash
 from config import settings
 
 from domains.entities import EnrichmentResult
@@ -22,33 +25,84 @@ from repositories import CacheRepository, EnrichmentRepository
 # Fix: Use relative imports instead of importing from services package
 from .classification_service import ClassificationService
 from .quality_service import QualityService
-from .pii_service import PIIService
+from .pii_service import get_pii_service
 
 from utils import PromptLoader
 import logging
 
 logger = logging.getLogger(__name__)
 
+_CONTENT_TOO_SHORT = "Content too short"
+
+# Score per confidence label; unknown labels count as low (0.25)
+_CONFIDENCE_SCORE = {"high": 1.0, "medium": 0.5, "low": 0.25}
+_CONFIDENCE_SECTIONS = ("work", "topic", "intent")
+
+
+def skip_reason(content: str) -> Optional[str]:
+    """Reason a message is not worth enriching, or None if it should be enriched"""
+    if len(content) < settings.MIN_ENRICH_LEN:
+        return _CONTENT_TOO_SHORT
+    return None
+
 
 class EnrichmentService:
     """Orchestrates the enrichment process"""
     
-    def __init__(self):
+    def __init__(self, persist_in_background: bool = True):
+        """
+        persist_in_background=False makes enrich_message await its cache and DB
+        writes and report a failed save as a failed enrichment. Workers and the
+        backfill need that: they ack or move on once enrich_message returns.
+        """
+        self.persist_in_background = persist_in_background
         self.classification_service = ClassificationService()
         self.quality_service = QualityService()
-        self.pii_service = PIIService()
+        self.pii_service = get_pii_service()
         self.cache_repo = CacheRepository()
         self.enrichment_repo = EnrichmentRepository()
         self.prompt_loader = PromptLoader()
+        # Fire-and-forget writes; strong references keep them from being collected mid-flight
+        self._background: Set[asyncio.Task] = set()
+        # Created on the first webhook and reused, so repeat hosts keep their connections
+        self._http_client: Optional[httpx.AsyncClient] = None
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """Run a side effect in the background, logging instead of raising its failure"""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._on_background_done)
+        return task
+    
+    def _on_background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background enrichment task failed: {task.exception()}")
+    
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Wait for pending background writes (called on shutdown)"""
+        if self._background:
+            await asyncio.wait(set(self._background), timeout=timeout)
+    
+    async def aclose(self) -> None:
+        """Finish background work and close the webhook HTTP client"""
+        await self.drain()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
     
     async def enrich_message(
         self,
-        request: EnrichmentRequestDTO
+        request: EnrichmentRequestDTO,
+        classification: Optional[Dict] = None
     ) -> EnrichmentResponseDTO:
         """
         Main enrichment orchestration
+        
+        A precomputed classification (from a batched LLM call) skips the
+        per-message classification call.
         """
-        start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         job_id = self._generate_job_id(request)
         
         try:
@@ -58,13 +112,7 @@ class EnrichmentService:
             
             if cached_result:
                 logger.info(f"Cache hit for message {request.message_id}")
-                return EnrichmentResponseDTO(
-                    job_id=job_id,
-                    status="completed",
-                    message_id=request.message_id,
-                    result=cached_result,
-                    cache_hit=True
-                )
+                return self._cache_hit_response(request, cached_result, job_id)
             
             # Wait for assistant response if needed
             if request.wait_for_response and request.role == "user":
@@ -78,14 +126,15 @@ class EnrichmentService:
             # Run enrichments in parallel
             tasks = []
             
-            # Classification (always run)
-            tasks.append(
-                self.classification_service.classify(
-                    request.content,
-                    request.assistant_response,
-                    request.conversation_history
+            # Classification (always run, unless already classified in a batch)
+            if classification is None:
+                tasks.append(
+                    self.classification_service.classify(
+                        request.content,
+                        request.assistant_response,
+                        request.conversation_history
+                    )
                 )
-            )
             
             # Quality analysis
             if request.include_quality_analysis:
@@ -104,32 +153,40 @@ class EnrichmentService:
             
             # Execute all tasks
             results = await asyncio.gather(*tasks)
+            if classification is not None:
+                results = [classification, *results]
             
             # Build result
             enrichment_result = self._build_result(
                 request,
                 results,
-                start_time
+                start_ns
             )
             
-            # Cache result
-            await self.cache_repo.set(
-                cache_key,
-                enrichment_result,
-                ttl=3600
-            )
-            
-            # Store in database
-            await self.enrichment_repo.save(enrichment_result)
+            if self.persist_in_background:
+                # Cache and persist in the background; the caller only needs the result
+                self._spawn(self.cache_repo.set(
+                    cache_key,
+                    enrichment_result,
+                    ttl=3600
+                ))
+                self._spawn(self.enrichment_repo.save(enrichment_result))
+            else:
+                _, saved = await asyncio.gather(
+                    self.cache_repo.set(cache_key, enrichment_result, ttl=3600),
+                    self.enrichment_repo.save(enrichment_result)
+                )
+                if not saved:
+                    raise RuntimeError("Failed to persist enrichment result")
             
-            return EnrichmentResponseDTO(
-                job_id=job_id,
-                status="completed",
-                message_id=request.message_id,
-                result=enrichment_result,
-                processing_time_ms=self._calculate_processing_time(start_time),
-                cache_hit=False
-            )
+            return EnrichmentResponseDTO.from_trusted({
+                "job_id": job_id,
+                "status": "completed",
+                "message_id": request.message_id,
+                "result": enrichment_result,
+                "processing_time_ms": self._calculate_processing_time(start_ns),
+                "cache_hit": False
+            })
             
         except Exception as e:
             logger.error(f"Enrichment failed for message {request.message_id}: {e}")
@@ -148,6 +205,7 @@ class EnrichmentService:
         Process a batch of messages
         """
         start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         batch_id = request.batch_id or f"batch_{uuid4().hex[:8]}"
         
         logger.info(f"Starting batch {batch_id} with {len(request.messages)} messages")
@@ -165,46 +223,77 @@ class EnrichmentService:
         )
         
         try:
+            # Short content never reaches the LLM; it is answered as skipped
+            messages_to_process = []
+            answered = []
+            for msg in request.messages:
+                reason = skip_reason(msg.content)
+                if reason is None:
+                    messages_to_process.append(msg)
+                else:
+                    answered.append(EnrichmentResponseDTO.from_trusted({
+                        "job_id": "skipped",
+                        "status": "skipped",
+                        "message_id": msg.message_id,
+                        "result": {"reason": reason}
+                    }))
+            
             # Deduplicate if requested
-            messages_to_process = request.messages
+            duplicates: List[Tuple[EnrichmentRequestDTO, str]] = []
             if request.deduplicate:
-                messages_to_process = self._deduplicate_messages(request.messages)
-                logger.info(f"Deduplicated: {len(request.messages)} -> {len(messages_to_process)}")
+                eligible = len(messages_to_process)
+                messages_to_process, duplicates = self._deduplicate_messages(messages_to_process)
+                logger.info(f"Deduplicated: {eligible} -> {len(messages_to_process)}")
+            
+            # One MGET for the whole batch; hits are answered here and never
+            # reach classification or the per-message cache lookup
+            if messages_to_process:
+                cached_results = await self.cache_repo.mget(
+                    [self._generate_cache_key(msg) for msg in messages_to_process]
+                )
+                misses = []
+                for msg, cached_result in zip(messages_to_process, cached_results):
+                    if cached_result:
+                        answered.append(self._cache_hit_response(msg, cached_result))
+                    else:
+                        misses.append(msg)
+                prefetch_hits = len(messages_to_process) - len(misses)
+                messages_to_process = misses
+            else:
+                prefetch_hits = 0
             
             # Group by conversation if context sharing is enabled
             if request.share_context:
-                conversation_groups = self._group_by_conversation(messages_to_process)
+                conversation_groups = request.group_by_conversation(messages_to_process)
             else:
                 conversation_groups = {msg.message_id: [msg] for msg in messages_to_process}
             
             # Process messages
-            results = []
+            results = answered
             errors = []
-            cache_hits = 0
+            cache_hits = prefetch_hits
             cache_misses = 0
+            response.processed_messages = response.successful_messages = len(answered)
             
             if request.parallel_processing:
-                # Process in parallel
-                tasks = []
-                for group_messages in conversation_groups.values():
-                    # Share context within conversation group
-                    shared_context = self._build_shared_context(group_messages)
-                    
-                    for msg in group_messages:
-                        if shared_context:
-                            msg.conversation_history = shared_context
-                        tasks.append(self._process_single_with_tracking(msg))
-                
-                # Execute all tasks
-                task_results = await asyncio.gather(*tasks, return_exceptions=True)
+                # Process conversation groups in parallel
+                groups = list(conversation_groups.values())
+                # One semaphore across all groups bounds the messages in flight for the batch
+                semaphore = asyncio.Semaphore(request.max_concurrent or settings.BATCH_MAX_CONCURRENCY)
+                group_results = await asyncio.gather(
+                    *(self._process_group(group_messages, semaphore) for group_messages in groups)
+                )
                 
-                # Process results
-                for i, result in enumerate(task_results):
+                # Process results (flattened in the same order as the groups)
+                for msg, result in zip(
+                    (msg for group_messages in groups for msg in group_messages),
+                    (result for results_in_group in group_results for result in results_in_group)
+                ):
                     if isinstance(result, Exception):
                         if request.fail_fast:
                             raise result
                         errors.append({
-                            "message_id": messages_to_process[i].message_id,
+                            "message_id": msg.message_id,
                             "error": str(result)
                         })
                         response.failed_messages += 1
@@ -222,13 +311,14 @@ class EnrichmentService:
                 # Process sequentially
                 for group_messages in conversation_groups.values():
                     shared_context = self._build_shared_context(group_messages)
+                    classifications = await self._classify_group(group_messages, shared_context)
                     
-                    for msg in group_messages:
+                    for msg, classification in zip(group_messages, classifications):
                         try:
                             if shared_context:
                                 msg.conversation_history = shared_context
                             
-                            result = await self._process_single_with_tracking(msg)
+                            result = await self._process_single_with_tracking(msg, classification)
                             results.append(result)
                             response.successful_messages += 1
                             
@@ -248,21 +338,48 @@ class EnrichmentService:
                         
                         response.processed_messages += 1
             
+            # Duplicates reuse the outcome of the first occurrence instead of another LLM call
+            if duplicates:
+                results_by_id = {result.message_id: result for result in results}
+                errors_by_id = {error["message_id"]: error["error"] for error in errors}
+                for msg, canonical_id in duplicates:
+                    canonical = results_by_id.get(canonical_id)
+                    if canonical is not None:
+                        update = {"message_id": msg.message_id, "cache_hit": True}
+                        # The nested result carries the ids too; give the duplicate its own
+                        if canonical.result is not None:
+                            update["result"] = {
+                                **canonical.result,
+                                "message_id": msg.message_id,
+                                "user_id": msg.user_id,
+                                "organization_id": msg.organization_id
+                            }
+                        results.append(canonical.model_copy(update=update))
+                        response.successful_messages += 1
+                        cache_hits += 1
+                    else:
+                        errors.append({
+                            "message_id": msg.message_id,
+                            "error": errors_by_id.get(canonical_id, f"Duplicate of {canonical_id} failed")
+                        })
+                        response.failed_messages += 1
+                    response.processed_messages += 1
+            
             # Update response
             response.status = "completed" if not errors else "partial"
             response.results = results if request.include_partial_results or not errors else None
             response.errors = errors if errors else None
             response.completed_at = datetime.utcnow()
-            response.processing_time_ms = self._calculate_processing_time(start_time)
+            response.processing_time_ms = self._calculate_processing_time(start_ns)
             response.cache_hits = cache_hits
             response.cache_misses = cache_misses
             
             # Store batch result
-            await self._store_batch_result(response)
+            await self.store_batch_status(response)
             
             # Trigger webhook if provided
             if request.webhook_url:
-                asyncio.create_task(self._trigger_webhook(request.webhook_url, response))
+                self._spawn(self._trigger_webhook(request.webhook_url, response))
             
             logger.info(f"Batch {batch_id} completed: {response.successful_messages}/{response.total_messages} successful")
             
@@ -273,19 +390,36 @@ class EnrichmentService:
             response.status = "failed"
             response.errors = [{"batch_error": str(e)}]
             response.completed_at = datetime.utcnow()
-            response.processing_time_ms = self._calculate_processing_time(start_time)
+            response.processing_time_ms = self._calculate_processing_time(start_ns)
+            # Replace the "processing" status stored when the batch was accepted
+            await self.store_batch_status(response)
             return response
     
+    def _cache_hit_response(
+        self,
+        request: EnrichmentRequestDTO,
+        cached_result: Dict,
+        job_id: Optional[str] = None
+    ) -> EnrichmentResponseDTO:
+        """Completed response for a result served from the cache"""
+        return EnrichmentResponseDTO.from_trusted({
+            "job_id": job_id or self._generate_job_id(request),
+            "status": "completed",
+            "message_id": request.message_id,
+            "result": cached_result,
+            "cache_hit": True
+        })
+    
     def _generate_job_id(self, request: EnrichmentRequestDTO) -> str:
         """Generate unique job ID"""
         data = f"{request.message_id}:{datetime.utcnow().isoformat()}"
-        return hashlib.md5(data.encode()).hexdigest()
+        return xxhash.xxh3_128_hexdigest(data)
     
     def _generate_cache_key(self, request: EnrichmentRequestDTO) -> str:
         """Generate cache key for request"""
         # Include assistant response in cache key if available
         data = f"{request.content}:{request.assistant_response or ''}"
-        return f"enrichment:{hashlib.md5(data.encode()).hexdigest()}"
+        return f"enrichment:{xxhash.xxh3_128_hexdigest(data)}"
     
     async def _wait_for_assistant_response(
         self,
@@ -293,25 +427,24 @@ class EnrichmentService:
         message_id: str,
         timeout: float = 5.0
     ) -> Optional[str]:
-        """Wait for assistant response with timeout"""
+        """Wait for assistant response with timeout
+        
+        Producers should PUBLISH the response on the key's channel as well as SET it;
+        the wait then returns as soon as it lands instead of on the next poll
+        """
         if not conversation_id:
             return None
         
-        for _ in range(int(timeout * 10)):  # Check every 100ms
-            response = await self.cache_repo.get(
-                f"assistant:{conversation_id}:{message_id}"
-            )
-            if response:
-                return response
-            await asyncio.sleep(0.1)
-        
-        return None
+        return await self.cache_repo.wait_for(
+            f"assistant:{conversation_id}:{message_id}",
+            timeout
+        )
     
     def _build_result(
         self,
         request: EnrichmentRequestDTO,
         results: List,
-        start_time: datetime
+        start_ns: int
     ) -> Dict:
         """Build enrichment result from component results"""
         classification = results[0]
@@ -323,7 +456,7 @@ class EnrichmentService:
             "user_id": request.user_id,
             "organization_id": request.organization_id,
             "enriched_at": datetime.utcnow().isoformat(),
-            "processing_time_ms": self._calculate_processing_time(start_time),
+            "processing_time_ms": self._calculate_processing_time(start_ns),
             "work_classification": classification.get("work"),
             "topic_classification": classification.get("topic"),
             "intent_classification": classification.get("intent"),
@@ -334,41 +467,95 @@ class EnrichmentService:
             "model_used": getattr(settings, "DEFAULT_MODEL", "gpt-4.1-nano")
         }
     
-    def _calculate_processing_time(self, start_time: datetime) -> float:
-        """Calculate processing time in milliseconds"""
-        delta = datetime.utcnow() - start_time
-        return delta.total_seconds() * 1000
+    def _calculate_processing_time(self, start_ns: int) -> float:
+        """Milliseconds elapsed since a time.perf_counter_ns() reading"""
+        return (time.perf_counter_ns() - start_ns) / 1e6
     
     def _calculate_overall_confidence(self, classification: Dict) -> float:
         """Calculate overall confidence score"""
-        confidences = []
+        total, count = 0.0, 0
         
-        for key in ["work", "topic", "intent"]:
+        for key in _CONFIDENCE_SECTIONS:
             if key in classification:
                 conf = classification[key].get("confidence", "medium")
-                if conf == "high":
-                    confidences.append(1.0)
-                elif conf == "medium":
-                    confidences.append(0.5)
-                else:
-                    confidences.append(0.25)
+                total += _CONFIDENCE_SCORE.get(conf, 0.25)
+                count += 1
+        
+        return total / count if count else 0.5
+    
+    async def _classify_group(
+        self,
+        messages: List[EnrichmentRequestDTO],
+        shared_context: List[Dict]
+    ) -> List[Optional[Dict]]:
+        """Classify a conversation group with batched LLM calls (None = classify per message)"""
+        classifications: List[Optional[Dict]] = [None] * len(messages)
+        
+        # Messages still waiting for their assistant response classify after the
+        # wait in enrich_message, so the response makes it into the prompt
+        ready = [
+            i for i, msg in enumerate(messages)
+            if msg.assistant_response is not None
+            or msg.role != "user"
+            or not msg.wait_for_response
+        ]
+        if len(ready) < 2:
+            return classifications
+        
+        try:
+            batched = await self.classification_service.classify_many(
+                [(messages[i].content, messages[i].assistant_response) for i in ready],
+                shared_context
+            )
+        except Exception as e:
+            logger.warning(f"Group classification failed, classifying per message: {e}")
+            return classifications
         
-        return sum(confidences) / len(confidences) if confidences else 0.5
+        for i, classification in zip(ready, batched):
+            classifications[i] = classification
+        return classifications
+    
+    async def _process_group(
+        self,
+        messages: List[EnrichmentRequestDTO],
+        semaphore: asyncio.Semaphore
+    ) -> List:
+        """Enrich one conversation group; per-message failures are returned, not raised"""
+        shared_context = self._build_shared_context(messages)
+        classifications = await self._classify_group(messages, shared_context)
+        
+        if shared_context:
+            for msg in messages:
+                msg.conversation_history = shared_context
+        
+        async def bounded(msg: EnrichmentRequestDTO, classification: Optional[Dict]):
+            async with semaphore:
+                return await self._process_single_with_tracking(msg, classification)
+        
+        return await asyncio.gather(
+            *(
+                bounded(msg, classification)
+                for msg, classification in zip(messages, classifications)
+            ),
+            return_exceptions=True
+        )
     
     async def _process_single_with_tracking(
         self,
-        request: EnrichmentRequestDTO
+        request: EnrichmentRequestDTO,
+        classification: Optional[Dict] = None
     ) -> EnrichmentResponseDTO:
         """Process single message with metrics tracking"""
-        start = datetime.utcnow()
-        result = await self.enrich_message(request)
+        start_ns = time.perf_counter_ns()
+        result = await self.enrich_message(request, classification)
         
         # Track per-message metrics (if monitoring is available)
         try:
             from utils import track_metric
             track_metric("message_processing_time", 
-                        (datetime.utcnow() - start).total_seconds() * 1000,
-                        {"organization": request.organization_id})
+                        self._calculate_processing_time(start_ns),
+                        {"organization": request.organization_id},
+                        reduce="mean")
         except ImportError:
             pass  # Monitoring not available
         
@@ -377,41 +564,43 @@ class EnrichmentService:
     def _deduplicate_messages(
         self,
         messages: List[EnrichmentRequestDTO]
-    ) -> List[EnrichmentRequestDTO]:
-        """Remove duplicate messages based on content hash"""
-        seen: Set[str] = set()
+    ) -> Tuple[List[EnrichmentRequestDTO], List[Tuple[EnrichmentRequestDTO, str]]]:
+        """Split messages into unique ones and (duplicate, canonical message_id) pairs"""
+        seen: Dict[int, str] = {}
+        # Messages of different lengths can't be duplicates, so the first message
+        # of each length pair is only hashed once a second one shows up
+        first_by_length: Dict[Tuple[int, int], Optional[EnrichmentRequestDTO]] = {}
         unique_messages = []
+        duplicates = []
         
         for msg in messages:
-            # Create content hash
-            content_hash = hashlib.md5(msg.content.encode()).hexdigest()
+            length_key = (len(msg.content), len(msg.assistant_response or ""))
+            if length_key not in first_by_length:
+                first_by_length[length_key] = msg
+                unique_messages.append(msg)
+                continue
+            
+            first = first_by_length[length_key]
+            if first is not None:
+                seen[self._dedup_hash(first)] = first.message_id
+                first_by_length[length_key] = None
             
-            if content_hash not in seen:
-                seen.add(content_hash)
+            # Same prompt and same assistant reply enrich identically
+            content_hash = self._dedup_hash(msg)
+            canonical_id = seen.get(content_hash)
+            if canonical_id is None:
+                seen[content_hash] = msg.message_id
                 unique_messages.append(msg)
             else:
-                logger.debug(f"Skipping duplicate message {msg.message_id}")
+                logger.debug(f"Message {msg.message_id} duplicates {canonical_id}")
+                duplicates.append((msg, canonical_id))
         
-        return unique_messages
+        return unique_messages, duplicates
     
-    def _group_by_conversation(
-        self,
-        messages: List[EnrichmentRequestDTO]
-    ) -> Dict[str, List[EnrichmentRequestDTO]]:
-        """Group messages by conversation ID"""
-        groups = {}
-        
-        for msg in messages:
-            conv_id = msg.conversation_id or msg.message_id
-            if conv_id not in groups:
-                groups[conv_id] = []
-            groups[conv_id].append(msg)
-        
-        # Sort messages within each conversation by message_id (assuming chronological)
-        for conv_id in groups:
-            groups[conv_id].sort(key=lambda m: m.message_id)
-        
-        return groups
+    @staticmethod
+    def _dedup_hash(msg: EnrichmentRequestDTO) -> int:
+        """Digest of the fields that determine an enrichment result"""
+        return xxhash.xxh3_64_intdigest(f"{msg.content}\0{msg.assistant_response or ''}")
     
     def _build_shared_context(
         self,
@@ -429,12 +618,12 @@ class EnrichmentService:
         
         return context
     
-    async def _store_batch_result(self, response: BatchEnrichmentResponseDTO):
-        """Store batch processing result"""
+    async def store_batch_status(self, response: BatchEnrichmentResponseDTO):
+        """Store batch status for GET /batch/{id}/status (in progress or final)"""
         try:
             await self.cache_repo.set(
                 f"batch:{response.batch_id}",
-                response.dict(),
+                response,
                 ttl=86400  # 24 hours
             )
         except Exception as e:
@@ -443,14 +632,15 @@ class EnrichmentService:
     async def _trigger_webhook(self, webhook_url: str, response: BatchEnrichmentResponseDTO):
         """Trigger webhook with batch results"""
         try:
-            import httpx
+            if self._http_client is None:
+                self._http_client = httpx.AsyncClient(timeout=30.0)
             
-            async with httpx.AsyncClient() as client:
-                await client.post(
-                    webhook_url,
-                    json=response.dict(),
-                    timeout=30.0
-                )
+            # pydantic-core writes the nested results straight to JSON bytes
+            await self._http_client.post(
+                webhook_url,
+                content=response.__pydantic_serializer__.to_json(response),
+                headers={"content-type": "application/json"}
+            )
             
             logger.info(f"Webhook triggered for batch {response.batch_id}")
         except Exception as e:
@@ -466,13 +656,19 @@ class EnrichmentService:
             # Check cache
             cached = await self.cache_repo.get(f"batch:{batch_id}")
             if cached:
-                response = BatchEnrichmentResponseDTO(**cached)
+                # Don't validate up to 100 nested results only to discard them
                 if not include_results:
-                    response.results = None
-                return response
+                    cached["results"] = None
+                return BatchEnrichmentResponseDTO.model_validate(cached)
             
             return None
             
         except Exception as e:
             logger.error(f"Failed to get batch status: {e}")
             return None
+
+
+@lru_cache(maxsize=1)
+def get_enrichment_service() -> EnrichmentService:
+    """Shared EnrichmentService, built once per process."""
+    return EnrichmentService()
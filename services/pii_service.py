@@ -1,33 +1,199 @@
 # services/pii_service.py
 """PII detection service (regex + GLiNER PII model when available)."""
 import asyncio
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
 import os
 import re
-from typing import Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import logging
 
+import xxhash
+
 logger = logging.getLogger(__name__)
 
+# Regex patterns remain as a fast, low-latency fallback; compiled once at import.
+_PATTERNS = {
+    "email": re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"),
+    "ssn": re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
+    "credit_card": re.compile(r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b"),
+    "ip_address": re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"),
+    "phone": re.compile(r"\b(?:\+?[1-9]\d{0,3}[-.\s]?)?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}\b"),
+}
+
+# One alternation with a named group per specific type: a single pass yields type and span.
+# The catch-all phone pattern stays out of it: as the leftmost match it would start at
+# an earlier digit ("ssn 2 123-45-6789") and swallow the SSN, card or IP after it
+_COMBINED_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{name}>{pattern.pattern})"
+        for name, pattern in _PATTERNS.items()
+        if name != "phone"
+    )
+)
+_PHONE_PATTERN = _PATTERNS["phone"]
+
+_NAME_PATTERN = re.compile(r"\b[A-Z][a-z]+\s+[A-Z][a-z]+\b")
+
+_NAME_FALSE_POSITIVES = frozenset({
+    "Hello World",
+    "Thank You",
+    "Best Regards",
+    "United States",
+    "New York",
+    "Los Angeles",
+    "Microsoft Office",
+    "Google Chrome",
+    "Apple iPhone",
+})
+
+# Cheap C-level prefilter: every pattern needs an "@" (email) or a digit (the rest),
+# so text without either never enters the backtracking scan
+_DIGIT = re.compile(r"\d")
+
+# Loaded GLiNER models by name, shared by every PIIService in the process;
+# the lock keeps concurrent first calls from loading the weights twice
+_GLINER_MODELS: Dict[str, Any] = {}
+_GLINER_LOCK = threading.Lock()
+# Label embeddings per (model, labels), for bi-encoder models that can encode labels once
+_GLINER_LABEL_EMBEDDINGS: Dict[tuple, Any] = {}
+
+# Texts up to this many characters are scanned inline: below it the scan is
+# cheaper than a thread hand-off
+INLINE_SCAN_LIMIT = 10_000
+
+# Detection results kept per content hash; retries and canned prompts repeat verbatim
+RESULT_CACHE_SIZE = int(os.getenv("PII_RESULT_CACHE_SIZE", 4096))
+
+
+def _mask_default(value: str) -> str:
+    return "***REDACTED***"
+
+
+def _mask_email(value: str) -> str:
+    parts = value.split("@")
+    if len(parts) == 2:
+        return f"{parts[0][:2]}***@{parts[1]}"
+    return _mask_default(value)
+
+
+def _mask_phone(value: str) -> str:
+    return f"***-***-{value[-4:]}"
+
+
+def _mask_credit_card(value: str) -> str:
+    return f"****-****-****-{value[-4:]}"
+
+
+def _mask_ssn(value: str) -> str:
+    return "***-**-" + value[-4:]
+
+
+def _mask_name(value: str) -> str:
+    parts = value.split()
+    if len(parts) >= 2:
+        return f"{parts[0][0]}*** {parts[-1][0]}***"
+    return _mask_default(value)
+
+
+def _mask_bank_account(value: str) -> str:
+    return "***" + value[-4:]
+
+
+# Masker per PII type; anything unlisted is fully redacted
+_MASKERS = {
+    "email": _mask_email,
+    "phone": _mask_phone,
+    "credit_card": _mask_credit_card,
+    "ssn": _mask_ssn,
+    "person_name": _mask_name,
+    "name": _mask_name,
+    "bank_account": _mask_bank_account,
+}
+
+
+class _GlinerBatcher:
+    """Coalesces concurrent GLiNER calls into batched predictions.
+
+    Requests queue up while a batch runs; the next batch takes up to max_batch
+    of them, waiting at most max_wait seconds for stragglers. Predictions run
+    on one dedicated thread, since the forward pass holds the GIL anyway.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[str]], List[List[Dict]]],
+        max_batch: int,
+        max_wait: float,
+    ):
+        self._predict_batch = predict_batch
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gliner")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, text: str) -> List[Dict]:
+        """Raw GLiNER predictions for one text."""
+        # Queue and consumer are bound to the running loop, so create them on first use
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self._predict_batch, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
 
 class PIIService:
     """Service for PII detection with model-assisted entities when enabled."""
 
     def __init__(self):
-        # Regex patterns remain as a fast, low-latency fallback
-        self.patterns = {
-            "email": re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"),
-            "phone": re.compile(r"\b(?:\+?[1-9]\d{0,3}[-.\s]?)?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}\b"),
-            "ssn": re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
-            "credit_card": re.compile(r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b"),
-            "ip_address": re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"),
-        }
-
-        self.name_pattern = re.compile(r"\b[A-Z][a-z]+\s+[A-Z][a-z]+\b")
+        self.patterns = _PATTERNS
+        self.combined_pattern = _COMBINED_PATTERN
+        self.phone_pattern = _PHONE_PATTERN
+        self.name_pattern = _NAME_PATTERN
 
         # GLiNER configuration
         self.enable_gliner = os.getenv("ENABLE_GLINER_PII", "true").lower() == "true"
         self.gliner_model_name = os.getenv("GLINER_PII_MODEL", "nvidia/gliner-PII")
         self.gliner_threshold = float(os.getenv("GLINER_PII_THRESHOLD", 0.35))
+        # ONNX export shipped with the model repo; ONNX Runtime releases the GIL during inference
+        self.gliner_onnx_file = os.getenv("GLINER_ONNX_FILE")
+        # fp32 | fp16 (CUDA only) | int8 (dynamic quantization of Linear layers, CPU)
+        self.gliner_precision = os.getenv("GLINER_PRECISION", "fp32").lower()
         # Label set is intentionally broad; model will emit only what it knows
         self.gliner_labels = [
             "PERSON",
@@ -47,69 +213,143 @@ class PIIService:
         ]
 
         self._gliner_model = None
+        self._label_embeddings = None
+        self._results: "OrderedDict[int, Dict]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Task] = {}
+        self._gliner_batcher = _GlinerBatcher(
+            self._predict_batch,
+            max_batch=int(os.getenv("GLINER_MAX_BATCH", 16)),
+            max_wait=float(os.getenv("GLINER_MAX_WAIT_MS", 5)) / 1000,
+        )
 
     async def detect(self, content: str) -> Dict:
+        """Detect PII, reusing the result for content seen recently or already in flight."""
+        key = xxhash.xxh3_64_intdigest(content)
+        cached = self._results.get(key)
+        if cached is not None:
+            self._results.move_to_end(key)
+            return dict(cached)
+
+        # Identical concurrent requests share one detection; shield it so a
+        # cancelled caller doesn't cancel it for the others
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._detect(content))
+            self._pending[key] = task
+            task.add_done_callback(lambda t: self._store_result(key, t))
+        return dict(await asyncio.shield(task))
+
+    def _store_result(self, key: int, task: asyncio.Task) -> None:
+        self._pending.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if result["detector"] == "error":
+            return
+        self._results[key] = result
+        if len(self._results) > RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+
+    async def _detect(self, content: str) -> Dict:
         """Detect PII using GLiNER if available, plus regex heuristics."""
         try:
-            regex_entities = self._detect_with_regex(content)
             gliner_entities = await self._detect_with_gliner(content) if self.enable_gliner else []
 
-            entities = self._merge_entities(regex_entities, gliner_entities)
-            pii_types = sorted({entity["type"] for entity in entities})
-
-            risk_level = self._calculate_risk_level(pii_types)
+            # Regex scanning and redaction are CPU-bound; long texts go to a thread
+            # so they don't stall the other enrichments sharing the event loop
+            if len(content) > INLINE_SCAN_LIMIT:
+                return await asyncio.to_thread(self._analyze, content, gliner_entities)
+            return self._analyze(content, gliner_entities)
 
-            redacted_content = None
-            if entities:
-                redacted_content = self._redact_content(content, entities)
-
-            return {
-                "has_pii": len(entities) > 0,
-                "pii_types": pii_types,
-                "risk_level": risk_level,
-                "entities": entities,
-                "redacted_content": redacted_content,
-                "detector": "gliner+regex" if gliner_entities else "regex",
-            }
+        except Exception as e:
+            logger.error(f"PII detection failed: {e}")
+            return self._failed_result()
 
+    def detect_sync(self, content: str) -> Dict:
+        """Regex-only detection for callers already off the event loop."""
+        try:
+            return self._analyze(content, [])
         except Exception as e:
             logger.error(f"PII detection failed: {e}")
-            return {
-                "has_pii": False,
-                "pii_types": [],
-                "risk_level": "none",
-                "entities": [],
-                "redacted_content": None,
-                "detector": "error",
-            }
+            return self._failed_result()
+
+    def _analyze(self, content: str, gliner_entities: List[Dict]) -> Dict:
+        """Regex scan, merge with model entities, score and redact."""
+        regex_entities = self._detect_with_regex(content)
+
+        entities = self._merge_entities(regex_entities, gliner_entities)
+        pii_types = tuple(sorted({entity["type"] for entity in entities}))
+
+        risk_level = self._calculate_risk_level(pii_types)
+
+        redacted_content = None
+        if entities:
+            redacted_content = self._redact_content(content, entities)
+
+        return {
+            "has_pii": len(entities) > 0,
+            "pii_types": pii_types,
+            "risk_level": risk_level,
+            "entities": tuple(entities),
+            "redacted_content": redacted_content,
+            "detector": "gliner+regex" if gliner_entities else "regex",
+        }
+
+    @staticmethod
+    def _failed_result() -> Dict:
+        return {
+            "has_pii": False,
+            "pii_types": (),
+            "risk_level": "none",
+            "entities": (),
+            "redacted_content": None,
+            "detector": "error",
+        }
 
     def _detect_with_regex(self, content: str) -> List[Dict]:
         """Regex-based detections as a low-cost fallback."""
         entities: List[Dict] = []
-        for pii_type, pattern in self.patterns.items():
-            matches = pattern.findall(content)
-            for match in matches:
-                # Use find to track span; safe even if repeated because precision is coarse
-                start = content.find(match)
+        if "@" in content or _DIGIT.search(content) is not None:
+            for match in self.combined_pattern.finditer(content):
+                pii_type = match.lastgroup
                 entities.append({
                     "type": pii_type,
-                    "value": self._mask_value(match, pii_type),
+                    "value": self._mask_value(match.group(), pii_type),
+                    "start": match.start(),
+                    "end": match.end(),
+                    "confidence": 0.6,
+                    "source": "regex",
+                })
+
+            # Phones in a second pass, skipping spans the specific types already claimed
+            # (both passes yield matches in order, so one cursor walks the claimed spans)
+            claimed = [(entity["start"], entity["end"]) for entity in entities]
+            cursor = 0
+            for match in self.phone_pattern.finditer(content):
+                start, end = match.span()
+                while cursor < len(claimed) and claimed[cursor][1] <= start:
+                    cursor += 1
+                if cursor < len(claimed) and claimed[cursor][0] < end:
+                    continue
+                entities.append({
+                    "type": "phone",
+                    "value": self._mask_value(match.group(), "phone"),
                     "start": start,
-                    "end": start + len(match),
+                    "end": end,
                     "confidence": 0.6,
                     "source": "regex",
                 })
 
         # Basic name detection
-        name_matches = self.name_pattern.findall(content)
-        potential_names = self._filter_names(name_matches)
-        for name in potential_names:
-            start = content.find(name)
+        for match in self.name_pattern.finditer(content):
+            name = match.group()
+            if name in _NAME_FALSE_POSITIVES:
+                continue
             entities.append({
                 "type": "person_name",
                 "value": self._mask_value(name, "name"),
-                "start": start,
-                "end": start + len(name),
+                "start": match.start(),
+                "end": match.end(),
                 "confidence": 0.4,
                 "source": "regex",
             })
@@ -117,23 +357,16 @@ class PIIService:
         return entities
 
     async def _detect_with_gliner(self, content: str) -> List[Dict]:
-        """Model-based detection with GLiNER PII (runs in a thread to avoid blocking)."""
+        """Model-based detection with GLiNER PII (micro-batched on a worker thread)."""
         model = self._ensure_gliner_loaded()
         if not model:
             return []
 
-        def _predict():
-            try:
-                return model.predict_entities(
-                    content,
-                    labels=self.gliner_labels,
-                    threshold=self.gliner_threshold,
-                )
-            except Exception as e:  # pragma: no cover - safety net
-                logger.warning(f"GLiNER prediction failed, falling back to regex: {e}")
-                return []
-
-        results = await asyncio.to_thread(_predict)
+        try:
+            results = await self._gliner_batcher.submit(content)
+        except Exception as e:  # pragma: no cover - safety net
+            logger.warning(f"GLiNER prediction failed, falling back to regex: {e}")
+            return []
 
         entities: List[Dict] = []
         for item in results:
@@ -157,44 +390,144 @@ class PIIService:
 
         return entities
 
+    def _predict_batch(self, texts: List[str]) -> List[List[Dict]]:
+        """One forward pass over several texts (blocking; runs on the batcher thread)."""
+        model = self._gliner_model
+        if self._label_embeddings is not None:
+            return model.batch_predict_with_embeds(
+                texts,
+                self._label_embeddings,
+                self.gliner_labels,
+                threshold=self.gliner_threshold,
+            )
+        if len(texts) > 1 and hasattr(model, "batch_predict_entities"):
+            return model.batch_predict_entities(
+                texts,
+                labels=self.gliner_labels,
+                threshold=self.gliner_threshold,
+            )
+        return [
+            model.predict_entities(text, labels=self.gliner_labels, threshold=self.gliner_threshold)
+            for text in texts
+        ]
+
+    def preload(self) -> None:
+        """Load GLiNER and run one tiny prediction so lazy submodules initialise before traffic.
+
+        Blocking; call it from a thread at startup.
+        """
+        model = self._ensure_gliner_loaded()
+        if model is None:
+            return
+        try:
+            model.predict_entities("x", labels=self.gliner_labels, threshold=self.gliner_threshold)
+        except Exception as e:
+            logger.warning(f"GLiNER warm-up prediction failed: {e}")
+
     def _ensure_gliner_loaded(self):
-        """Lazy-load the GLiNER model to keep startup light."""
+        """Load the GLiNER model once per process (shared across instances)."""
         if not self.enable_gliner:
             return None
 
         if self._gliner_model is not None:
             return self._gliner_model
 
-        try:
-            from gliner import GLiNER
+        with _GLINER_LOCK:
+            model = _GLINER_MODELS.get(self.gliner_model_name)
+            if model is None:
+                try:
+                    from gliner import GLiNER
+
+                    token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACEHUB_API_TOKEN")
+                    onnx_kwargs = {}
+                    if self.gliner_onnx_file:
+                        onnx_kwargs = {
+                            "load_onnx_model": True,
+                            "load_tokenizer": True,
+                            "onnx_model_file": self.gliner_onnx_file,
+                        }
+                    model = GLiNER.from_pretrained(
+                        self.gliner_model_name,
+                        token=token,
+                        **onnx_kwargs,
+                    )
+                    if not self.gliner_onnx_file:
+                        model = self._apply_precision(model)
+                    _GLINER_MODELS[self.gliner_model_name] = model
+                    backend = "onnx" if self.gliner_onnx_file else f"torch {self.gliner_precision}"
+                    logger.info(f"Loaded GLiNER model: {self.gliner_model_name} ({backend})")
+                except Exception as e:
+                    logger.warning(f"GLiNER unavailable, using regex only: {e}")
+                    self.enable_gliner = False
+                    return None
+
+        self._gliner_model = model
+        self._label_embeddings = self._encode_labels(model)
+        return self._gliner_model
+
+    def _apply_precision(self, model):
+        """Move/convert the torch model for GLINER_PRECISION; falls back to fp32 when unsupported."""
+        if self.gliner_precision == "fp32":
+            return model
+
+        import torch
+
+        if self.gliner_precision == "fp16":
+            if not torch.cuda.is_available():
+                logger.warning("GLINER_PRECISION=fp16 needs CUDA; keeping fp32 on CPU")
+                self.gliner_precision = "fp32"
+                return model
+            return model.to("cuda").half()
 
-            token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACEHUB_API_TOKEN")
-            self._gliner_model = GLiNER.from_pretrained(
-                self.gliner_model_name,
-                token=token,
+        if self.gliner_precision == "int8":
+            return torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
             )
-            logger.info(f"Loaded GLiNER model: {self.gliner_model_name}")
-        except Exception as e:
-            logger.warning(f"GLiNER unavailable, using regex only: {e}")
-            self.enable_gliner = False
-            self._gliner_model = None
 
-        return self._gliner_model
+        logger.warning(f"Unknown GLINER_PRECISION {self.gliner_precision!r}; keeping fp32")
+        self.gliner_precision = "fp32"
+        return model
+
+    def _encode_labels(self, model) -> Any:
+        """Label embeddings computed once, or None when the model re-encodes labels per call.
+
+        Only bi-encoder GLiNER models can do this; uni-encoder models (the default
+        PII model included) read the labels inside the text sequence itself.
+        """
+        if not hasattr(model, "encode_labels") or not hasattr(model, "batch_predict_with_embeds"):
+            return None
+
+        key = (self.gliner_model_name, tuple(self.gliner_labels))
+        with _GLINER_LOCK:
+            if key not in _GLINER_LABEL_EMBEDDINGS:
+                try:
+                    _GLINER_LABEL_EMBEDDINGS[key] = model.encode_labels(self.gliner_labels)
+                except Exception as e:
+                    logger.info(f"GLiNER labels not pre-encodable, encoding per call: {e}")
+                    _GLINER_LABEL_EMBEDDINGS[key] = None
+            return _GLINER_LABEL_EMBEDDINGS[key]
 
     def _merge_entities(self, regex_entities: List[Dict], gliner_entities: List[Dict]) -> List[Dict]:
         """Combine entities, preferring GLiNER spans and dropping overlapping regex spans."""
         combined = gliner_entities + []
 
+        if gliner_entities:
+            # Spans sorted by start with a running max of their ends: a regex span
+            # overlaps some GLiNER span iff, among those starting at or before its
+            # end, the furthest-reaching one ends at or after its start
+            spans = sorted((e["start"], e["end"]) for e in gliner_entities)
+            starts = [start for start, _ in spans]
+            reach = list(accumulate((end for _, end in spans), max))
+
         for entity in regex_entities:
             # Skip any regex entity that overlaps a GLiNER span (any type) to avoid double-redaction
-            if any(
-                e["start"] <= entity["end"] and entity["start"] <= e["end"]
-                for e in gliner_entities
-            ):
-                continue
+            if gliner_entities:
+                idx = bisect_right(starts, entity["end"])
+                if idx and reach[idx - 1] >= entity["start"]:
+                    continue
             combined.append(entity)
 
-        # Sort for deterministic output
+        # Sort for deterministic output; _redact_content relies on this order
         return sorted(combined, key=lambda e: (e["start"], -e.get("confidence", 0)))
 
     def _normalize_label(self, label: str) -> Optional[str]:
@@ -223,42 +556,7 @@ class PIIService:
 
     def _mask_value(self, value: str, pii_type: str) -> str:
         """Mask PII value for storage."""
-        if pii_type == "email":
-            parts = value.split("@")
-            if len(parts) == 2:
-                return f"{parts[0][:2]}***@{parts[1]}"
-        elif pii_type == "phone":
-            return f"***-***-{value[-4:]}"
-        elif pii_type == "credit_card":
-            return f"****-****-****-{value[-4:]}"
-        elif pii_type == "ssn":
-            return "***-**-" + value[-4:]
-        elif pii_type in {"person_name", "name"}:
-            parts = value.split()
-            if len(parts) >= 2:
-                return f"{parts[0][0]}*** {parts[-1][0]}***"
-        elif pii_type == "bank_account":
-            return "***" + value[-4:]
-        elif pii_type in {"username", "password"}:
-            return "***REDACTED***"
-
-        return "***REDACTED***"
-
-    def _filter_names(self, potential_names: List[str]) -> List[str]:
-        """Filter out common non-name matches."""
-        false_positives = {
-            "Hello World",
-            "Thank You",
-            "Best Regards",
-            "United States",
-            "New York",
-            "Los Angeles",
-            "Microsoft Office",
-            "Google Chrome",
-            "Apple iPhone",
-        }
-
-        return [name for name in potential_names if name not in false_positives]
+        return _MASKERS.get(pii_type, _mask_default)(value)
 
     def _calculate_risk_level(self, pii_types: List[str]) -> str:
         """Calculate risk level based on PII types."""
@@ -275,16 +573,29 @@ class PIIService:
         return "low"
 
     def _redact_content(self, content: str, entities: List[Dict]) -> str:
-        """Redact PII from content."""
-        redacted = content
-
-        sorted_entities = sorted(entities, key=lambda x: x["start"], reverse=True)
+        """Redact PII from content; entities must be sorted by start, as _merge_entities returns them."""
+        parts: List[str] = []
+        cursor = 0
 
-        for entity in sorted_entities:
+        # One left-to-right pass; a span starting inside the previous one extends it
+        for entity in entities:
             start = entity["start"]
             end = entity["end"]
             if start < 0 or end < 0:
                 continue
-            redacted = redacted[:start] + "[REDACTED]" + redacted[end:]
+            if start < cursor:
+                if end > cursor:
+                    cursor = end
+                continue
+            parts.append(content[cursor:start])
+            parts.append("[REDACTED]")
+            cursor = end
+
+        parts.append(content[cursor:])
+        return "".join(parts)
+
 
-        return redacted
+@lru_cache(maxsize=1)
+def get_pii_service() -> PIIService:
+    """Shared PIIService so the GLiNER model is loaded once per process."""
+    return PIIService()
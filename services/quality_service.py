@@ -2,23 +2,66 @@
 """
 Quality analysis service
 """
-import json
 import re
+import orjson
 from typing import Optional, Dict, List
-from core import llm_client
-from utils import PromptLoader
+import core
+from utils import PromptLoader, render_template
 from domains.enums import QualityLevel
 import logging
 
 logger = logging.getLogger(__name__)
 
+_HEURISTIC_PHRASES = {
+    "role": (
+        "you are", "act as", "pretend", "imagine you",
+        "tu es", "agis comme", "en tant que"
+    ),
+    "context": (
+        "context:", "background:", "given that",
+        "contexte:", "sachant que"
+    ),
+    "goal": (
+        "i want", "i need", "please help", "can you",
+        "je veux", "j'ai besoin", "peux-tu"
+    ),
+}
+
+# One scan for all categories; the zero-width lookahead lets phrases overlap
+# (e.g. "peux-tu es") without one match hiding another
+_HEURISTIC_PATTERN = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{name}>" + "|".join(re.escape(p) for p in phrases) + ")"
+        for name, phrases in _HEURISTIC_PHRASES.items()
+    ) + ")",
+    re.IGNORECASE
+)
+_SENTENCE_END = re.compile(r'[.!?]+')
+
+_CLARIFICATION_PHRASES = (
+    "could you clarify",
+    "could you provide more",
+    "what specifically",
+    "can you elaborate",
+    "do you mean",
+    "which particular",
+    "pouvez-vous préciser",
+    "pourriez-vous clarifier"
+)
+_CLARIFICATION_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(p) for p in _CLARIFICATION_PHRASES) + "))",
+    re.IGNORECASE
+)
+
 
 class QualityService:
     """Service for quality analysis"""
     
     def __init__(self):
-        self.llm = llm_client
+        self.llm = core.llm_client
         self.prompt_loader = PromptLoader()
+        # Read and split once; each analysis only joins the parts
+        self._prompt_parts = self.prompt_loader.load_compiled("quality_analysis.txt")
     
     async def analyze(
         self,
@@ -32,14 +75,12 @@ class QualityService:
             # Quick heuristics
             heuristics = self._analyze_heuristics(content, assistant_response)
             
-            # Load prompt
-            prompt_template = self.prompt_loader.load("quality_analysis.txt")
-            
             # Detect clarification signals
             clarification_signals = self._detect_clarification(assistant_response)
             
             # Build prompt
-            prompt = prompt_template.format(
+            prompt = render_template(
+                self._prompt_parts,
                 user_message=content[:2000],
                 assistant_response=assistant_response[:2000] if assistant_response else "Not available",
                 clarification_signals=clarification_signals
@@ -63,32 +104,31 @@ class QualityService:
             logger.error(f"Quality analysis failed: {e}")
             return self._get_default_quality()
     
+    def preload(self) -> None:
+        """Run the heuristic and clarification scans once so the first request skips lazy setup"""
+        self._analyze_heuristics("You are an analyst. Context: warm-up. Can you help?", None)
+        self._detect_clarification("Could you clarify what you mean?")
+    
     def _analyze_heuristics(self, content: str, assistant_response: Optional[str]) -> Dict:
         """Quick heuristic analysis"""
-        # Check for role setting
-        has_role = any(pattern in content.lower() for pattern in [
-            "you are", "act as", "pretend", "imagine you",
-            "tu es", "agis comme", "en tant que"
-        ])
-        
-        # Check for context
-        has_context = any(pattern in content.lower() for pattern in [
-            "context:", "background:", "given that",
-            "contexte:", "sachant que"
-        ])
+        # Role / context / goal phrases in a single case-insensitive pass, stopping once all are seen
+        found = set()
+        for match in _HEURISTIC_PATTERN.finditer(content):
+            found.add(match.lastgroup)
+            if len(found) == len(_HEURISTIC_PHRASES):
+                break
         
-        # Check for clear goal
-        has_goal = any(pattern in content.lower() for pattern in [
-            "i want", "i need", "please help", "can you",
-            "je veux", "j'ai besoin", "peux-tu"
-        ])
+        # Same count as len(re.split(...)) without building the pieces
+        sentence_count = 1
+        for _ in _SENTENCE_END.finditer(content):
+            sentence_count += 1
         
         return {
-            "has_clear_role": has_role,
-            "has_context": has_context,
-            "has_clear_goal": has_goal,
+            "has_clear_role": "role" in found,
+            "has_context": "context" in found,
+            "has_clear_goal": "goal" in found,
             "word_count": len(content.split()),
-            "sentence_count": len(re.split(r'[.!?]+', content))
+            "sentence_count": sentence_count
         }
     
     def _detect_clarification(self, assistant_response: Optional[str]) -> str:
@@ -96,18 +136,9 @@ class QualityService:
         if not assistant_response:
             return "No assistant response available"
         
-        clarification_patterns = [
-            "could you clarify",
-            "could you provide more",
-            "what specifically",
-            "can you elaborate",
-            "do you mean",
-            "which particular",
-            "pouvez-vous préciser",
-            "pourriez-vous clarifier"
-        ]
-        
-        found_patterns = [p for p in clarification_patterns if p in assistant_response.lower()]
+        # One case-insensitive scan of the original text; report hits in list order
+        hits = {m.group(1).lower() for m in _CLARIFICATION_PATTERN.finditer(assistant_response)}
+        found_patterns = [p for p in _CLARIFICATION_PHRASES if p in hits]
         
         if found_patterns:
             return f"Assistant asked for clarification: {', '.join(found_patterns)}"
@@ -125,7 +156,7 @@ class QualityService:
                     response = response[4:]
             
             # Parse JSON
-            data = json.loads(response)
+            data = orjson.loads(response)
             
             return {
                 "overall_score": float(data.get("overall_score", 5)),
@@ -1,23 +1,33 @@
 """Lightweight chat classification using gpt-4.1-nano + compact prompt."""
 from typing import Dict, Optional
-from core import llm_client
-from utils import PromptLoader
-import json
+import core
+from core.llm import LLMClient
+from utils import PromptLoader, render_template
 import re
+import orjson
+from types import MappingProxyType
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Read-only defaults for unparseable replies and missing fields
+CHAT_DEFAULTS = MappingProxyType({
+    "is_work_related": False,
+    "theme": "non_work",
+    "intent": "non_work",
+})
+
 
 class SimpleClassificationService:
     def __init__(self, prompt_name: str = "chat_classification_quality.txt"):
-        self.llm = llm_client
+        self.llm = core.llm_client
         self.prompt_loader = PromptLoader()
         self.prompt_name = prompt_name
+        self._prompt_parts = self.prompt_loader.load_compiled(prompt_name)
 
     async def classify(self, user_message: str, assistant_response: Optional[str] = None) -> Dict:
-        prompt = self.prompt_loader.load(self.prompt_name)
-        formatted = prompt.format(
+        formatted = render_template(
+            self._prompt_parts,
             user_message=user_message[:2000],
             assistant_response=assistant_response[:2000] if assistant_response else "Not provided",
         )
@@ -35,12 +45,7 @@ class SimpleClassificationService:
 
         # Final fallback
         logger.error(f"Failed to parse classification response, returning default. Raw: {response}")
-        return {
-            "is_work_related": False,
-            "theme": "non_work",
-            "intent": "non_work",
-            "raw": response,
-        }
+        return {**CHAT_DEFAULTS, "raw": response}
 
     def _coerce_json(self, text):
         """Attempt to coerce LLM output to JSON, removing fences and junk."""
@@ -53,32 +58,21 @@ class SimpleClassificationService:
                 return None
 
         try:
-            return json.loads(text)
+            return orjson.loads(text)
         except Exception:
             pass
 
-        cleaned = text.strip()
-
-        # strip code fences
-        if cleaned.startswith("```"):
-            parts = cleaned.split("```")
-            cleaned = parts[1] if len(parts) > 1 else cleaned
-        if cleaned.startswith("json"):
-            cleaned = cleaned[4:]
-
-        # isolate first JSON object boundaries
-        start = cleaned.find("{")
-        end = cleaned.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            candidate = cleaned[start : end + 1]
+        # isolate the JSON object (fenced or bare) in a single regex pass
+        candidate = LLMClient.extract_json(text)
+        if candidate is not None:
             try:
-                return json.loads(candidate)
+                return orjson.loads(candidate)
             except Exception:
                 # try to remove trailing commas or control chars
                 candidate = re.sub(r"\,\s*}\s*$", "}", candidate, flags=re.DOTALL)
                 candidate = candidate.replace("\n", " ")
                 try:
-                    return json.loads(candidate)
+                    return orjson.loads(candidate)
                 except Exception:
                     logger.debug(f"JSON coercion failed for candidate: {candidate}")
         return None
@@ -0,0 +1,56 @@
+# services/warmup.py
+"""
+Startup warm-up so the first request after a deploy doesn't pay cold-start costs
+"""
+import asyncio
+import time
+import core
+from utils import PromptLoader
+from .pii_service import get_pii_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Every template the request paths load
+PROMPTS = (
+    "unified_classification.txt",
+    "unified_classification_batch.txt",
+    "quality_analysis.txt",
+    "chat_classification_quality.txt",
+)
+
+# Hits every regex alternative and the name scan
+_SAMPLE_TEXT = (
+    "You are John Smith, reach me at warmup@example.com or 555-123-4567. "
+    "Context: card 4111 1111 1111 1111, SSN 123-45-6789, host 10.0.0.1. Can you help?"
+)
+
+
+async def warm_up() -> None:
+    """Fill the shared prompt cache, build shared services and open the LLM connection"""
+    start = time.perf_counter()
+    
+    loader = PromptLoader()
+    loader.preload()
+    for name in PROMPTS:
+        loader.load_compiled(name)
+    
+    # Builds the shared services (and, through them, the classification templates)
+    from .enrichment_service import get_enrichment_service
+    service = get_enrichment_service()
+    
+    # One pass through the pure-CPU paths so the first request doesn't trip lazy setup
+    service.pii_service.detect_sync(_SAMPLE_TEXT)
+    service.quality_service.preload()
+    
+    # GLiNER weights load (and first inference) in a thread; no-op when disabled
+    await asyncio.to_thread(get_pii_service().preload)
+    
+    # A metadata GET connects the pooled HTTP client (DNS + TLS) without spending tokens;
+    # complete() can't be used as a ping because it requests JSON output
+    try:
+        await core.llm_client.client.models.retrieve(core.llm_client.model)
+    except Exception as e:
+        logger.warning(f"LLM warm-up request failed: {e}")
+    
+    logger.info("Warm-up finished in %.1fms", (time.perf_counter() - start) * 1000)
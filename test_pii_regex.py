@@ -0,0 +1,46 @@
+# test_pii_regex.py - Regression cases for the regex PII scan (no GLiNER)
+import os
+
+os.environ["ENABLE_GLINER_PII"] = "false"
+
+from services.pii_service import PIIService
+
+# A digit before the value must not let the catch-all phone pattern swallow it
+CASES = [
+    ("ssn 2 123-45-6789", "ssn", "123-45-6789", "high"),
+    ("Order 12 4111 1111 1111 1111", "credit_card", "4111 1111 1111 1111", "high"),
+    ("id 7 192.168.1.10", "ip_address", "192.168.1.10", "medium"),
+]
+
+
+def test_specific_types_win_over_phone():
+    """Specific formats are reported even when a phone match could start earlier"""
+    service = PIIService()
+    for text, pii_type, value, risk_level in CASES:
+        result = service.detect_sync(text)
+        spans = [
+            (entity["type"], text[entity["start"]:entity["end"]])
+            for entity in result["entities"]
+        ]
+        assert (pii_type, value) in spans, (text, spans)
+        # No phone overlapping the specific match
+        start = text.index(value)
+        assert not any(
+            entity["type"] == "phone" and entity["start"] < start + len(value) and entity["end"] > start
+            for entity in result["entities"]
+        ), (text, spans)
+        assert result["risk_level"] == risk_level, (text, result["risk_level"])
+
+
+def test_phone_still_detected():
+    """Phones outside the claimed spans are still reported"""
+    service = PIIService()
+    result = service.detect_sync("SSN 123-45-6789, call me at 415-555-1234")
+    types = [entity["type"] for entity in result["entities"]]
+    assert types == ["ssn", "phone"], types
+
+
+if __name__ == "__main__":
+    test_specific_types_win_over_phone()
+    test_phone_still_detected()
+    print("PII regex regression cases passed")
@@ -1,12 +1,15 @@
 # utils/__init__.py
-from .prompt_loader import PromptLoader
-from .cache_helpers import generate_cache_key, parse_cache_ttl
+from .prompt_loader import PromptLoader, compile_template, render_template
+from .cache_helpers import generate_cache_key, parse_cache_ttl, stable_batch_id
 from .monitoring import setup_monitoring, track_metric, log_event
 
 __all__ = [
     "PromptLoader",
+    "compile_template",
+    "render_template",
     "generate_cache_key",
     "parse_cache_ttl",
+    "stable_batch_id",
     "setup_monitoring",
     "track_metric",
     "log_event"
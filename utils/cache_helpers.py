@@ -2,18 +2,28 @@
 """
 Cache helper utilities
 """
-import hashlib
-from typing import Any
-import json
+from typing import Any, Iterable
+import orjson
+import xxhash
 
 
 def generate_cache_key(*args) -> str:
     """Generate a cache key from arguments"""
+    # Plain strings hash directly; only structured arguments need JSON encoding
+    if all(type(arg) is str for arg in args):
+        return xxhash.xxh3_128_hexdigest("\0".join(args))
+    
     # Combine all arguments
-    data = json.dumps(args, sort_keys=True, default=str)
+    data = orjson.dumps(args, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
     
     # Generate hash
-    return hashlib.md5(data.encode()).hexdigest()
+    return xxhash.xxh3_128_hexdigest(data)
+
+
+def stable_batch_id(messages: Iterable[Any]) -> str:
+    """Batch ID derived from the message IDs only, identical on every worker"""
+    digest = xxhash.xxh3_64_hexdigest(orjson.dumps([m.message_id for m in messages]))
+    return f"batch_{digest}"
 
 
 def parse_cache_ttl(ttl_str: str) -> int:
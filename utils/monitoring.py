@@ -4,10 +4,13 @@ Monitoring and metrics utilities
 """
 import time
 import asyncio
+import queue
+import threading
 from functools import wraps
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from config import settings
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
 logger = logging.getLogger(__name__)
 
@@ -23,110 +26,212 @@ except ImportError:
 # Global clients
 metrics_client = None
 logging_client = None
+cloud_logger = None
+
+# Handler I/O (stdout, Cloud Logging) runs on listener threads; callers only enqueue
+_event_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listeners: List[QueueListener] = []
+_root_handlers: List[logging.Handler] = []
+
+# Metric points are aggregated per series and written in bulk: the Monitoring API
+# takes up to 200 series per call and rejects more than one point per series per ~minute
+METRIC_FLUSH_INTERVAL = 60
+_PROJECT_NAME = f"projects/{settings.GCP_PROJECT_ID}"
+MAX_SERIES_PER_WRITE = 200
+_metric_buffer: Dict[Tuple[str, Tuple[Tuple[str, str], ...], str], List[float]] = {}
+_metric_lock = threading.Lock()
+_metric_stop = threading.Event()
+_metric_thread = None
+
+
+class _CloudEventHandler(logging.Handler):
+    """Ships the structured payload attached by log_event to Cloud Logging"""
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            cloud_logger.log_struct(record.payload)
+        except Exception:
+            self.handleError(record)
 
 
 def setup_monitoring():
     """Setup monitoring clients"""
-    global metrics_client, logging_client
+    global metrics_client, logging_client, cloud_logger
     
     if GCP_MONITORING_AVAILABLE and settings.GCP_PROJECT_ID != "local-project":
         try:
             metrics_client = monitoring_v3.MetricServiceClient()
             logging_client = gcp_logging.Client()
+            cloud_logger = logging_client.logger("enrichment-service")
             logger.info("Monitoring clients initialized")
         except Exception as e:
             logger.warning(f"Monitoring setup failed: {e}")
     else:
         logger.info("Using local monitoring only")
+    
+    _start_log_listeners()
+    _start_metric_flusher()
 
 
-def track_metric(name: str, value: float, labels: Dict[str, str] = None):
-    """Track a custom metric"""
-    # For local development, just log the metric
-    logger.debug(f"Metric: {name}={value} labels={labels}")
+def _start_log_listeners():
+    """Put the root handlers (and Cloud Logging events) behind queues drained by background threads"""
+    if _listeners:
+        return
     
-    if not metrics_client:
+    root = logging.getLogger()
+    if root.handlers:
+        _root_handlers[:] = root.handlers
+        log_queue = queue.SimpleQueue()
+        _listeners.append(QueueListener(log_queue, *root.handlers, respect_handler_level=True))
+        root.handlers = [QueueHandler(log_queue)]
+    
+    if cloud_logger is not None:
+        _listeners.append(QueueListener(_event_queue, _CloudEventHandler()))
+    
+    for listener in _listeners:
+        listener.start()
+
+
+def _start_metric_flusher():
+    """Write buffered metrics from a daemon thread every METRIC_FLUSH_INTERVAL seconds"""
+    global _metric_thread
+    if metrics_client is None or _metric_thread is not None:
         return
     
-    try:
-        project_name = f"projects/{settings.GCP_PROJECT_ID}"
-        
+    def _run():
+        while not _metric_stop.wait(METRIC_FLUSH_INTERVAL):
+            flush_metrics()
+    
+    _metric_thread = threading.Thread(target=_run, name="metric-flusher", daemon=True)
+    _metric_thread.start()
+
+
+def flush_metrics():
+    """Write every buffered series (blocking; runs on the flusher thread and at shutdown)"""
+    with _metric_lock:
+        if not _metric_buffer:
+            return
+        pending = list(_metric_buffer.items())
+        _metric_buffer.clear()
+    
+    now = time.time()
+    seconds = int(now)
+    nanos = int((now - seconds) * 10 ** 9)
+    interval = monitoring_v3.TimeInterval(
+        {"end_time": {"seconds": seconds, "nanos": nanos}}
+    )
+    
+    all_series = []
+    for (name, labels, reduce), (total, count) in pending:
         series = monitoring_v3.TimeSeries()
         series.metric.type = f"custom.googleapis.com/{name}"
-        
-        if labels:
-            for key, val in labels.items():
-                series.metric.labels[key] = val
-        
-        now = time.time()
-        seconds = int(now)
-        nanos = int((now - seconds) * 10 ** 9)
-        interval = monitoring_v3.TimeInterval(
-            {"end_time": {"seconds": seconds, "nanos": nanos}}
-        )
-        point = monitoring_v3.Point(
+        for key, val in labels:
+            series.metric.labels[key] = val
+        value = total / count if reduce == "mean" else float(total)
+        series.points = [monitoring_v3.Point(
             {"interval": interval, "value": {"double_value": value}}
-        )
-        series.points = [point]
-        
-        metrics_client.create_time_series(
-            name=project_name,
-            time_series=[series]
-        )
-    except Exception as e:
-        logger.error(f"Failed to track metric {name}: {e}")
+        )]
+        all_series.append(series)
+    
+    for i in range(0, len(all_series), MAX_SERIES_PER_WRITE):
+        chunk = all_series[i:i + MAX_SERIES_PER_WRITE]
+        try:
+            metrics_client.create_time_series(name=_PROJECT_NAME, time_series=chunk)
+        except Exception as e:
+            logger.error(f"Failed to write {len(chunk)} metric series: {e}")
+
+
+def shutdown_monitoring():
+    """Flush queued log records, stop the listener threads and restore direct logging"""
+    global _metric_thread
+    if _metric_thread is not None:
+        _metric_stop.set()
+        _metric_thread.join()
+        _metric_thread = None
+        flush_metrics()
+    
+    while _listeners:
+        _listeners.pop().stop()
+    if _root_handlers:
+        logging.getLogger().handlers = _root_handlers[:]
+        _root_handlers.clear()
+
+
+def track_metric(name: str, value: float, labels: Dict[str, str] = None, reduce: str = "sum"):
+    """Track a custom metric
+    
+    Points are buffered and written once per flush interval: counters are summed
+    over the interval, reduce="mean" averages them instead (use it for timings).
+    """
+    # For local development, just log the metric (%-args: nothing is formatted when DEBUG is off)
+    logger.debug("Metric: %s=%s labels=%s", name, value, labels)
+    
+    if not metrics_client:
+        return
+    
+    key = (name, tuple(sorted(labels.items())) if labels else (), reduce)
+    with _metric_lock:
+        acc = _metric_buffer.get(key)
+        if acc is None:
+            _metric_buffer[key] = [value, 1]
+        else:
+            acc[0] += value
+            acc[1] += 1
 
 
 def log_event(event_name: str, data: Dict[str, Any]):
     """Log a structured event"""
     # For local development, just use standard logging
-    logger.info(f"Event: {event_name} data={data}")
+    logger.info("Event: %s data=%s", event_name, data)
     
-    if not logging_client:
+    if not _listeners or cloud_logger is None:
         return
     
-    try:
-        cloud_logger = logging_client.logger("enrichment-service")
-        cloud_logger.log_struct({
+    # The Cloud Logging write happens on the listener thread
+    _event_queue.put_nowait(logging.makeLogRecord({
+        "msg": event_name,
+        "payload": {
             "event": event_name,
             "service": settings.SERVICE_NAME,
             "environment": settings.ENVIRONMENT,
             **data
-        })
-    except Exception as e:
-        logger.error(f"Failed to log event {event_name}: {e}")
+        }
+    }))
 
 
 def measure_time(metric_name: str):
     """Decorator to measure function execution time"""
+    duration_metric = f"{metric_name}_duration_ms"
+    error_metric = f"{metric_name}_errors"
+    
     def decorator(func):
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            start = time.time()
-            try:
-                result = await func(*args, **kwargs)
-                duration = (time.time() - start) * 1000
-                track_metric(f"{metric_name}_duration_ms", duration)
-                return result
-            except Exception as e:
-                track_metric(f"{metric_name}_errors", 1)
-                raise
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    result = await func(*args, **kwargs)
+                    duration = (time.perf_counter_ns() - start) / 1_000_000
+                    track_metric(duration_metric, duration, reduce="mean")
+                    return result
+                except Exception:
+                    track_metric(error_metric, 1)
+                    raise
+            
+            return async_wrapper
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            start = time.time()
+            start = time.perf_counter_ns()
             try:
                 result = func(*args, **kwargs)
-                duration = (time.time() - start) * 1000
-                track_metric(f"{metric_name}_duration_ms", duration)
+                duration = (time.perf_counter_ns() - start) / 1_000_000
+                track_metric(duration_metric, duration, reduce="mean")
                 return result
-            except Exception as e:
-                track_metric(f"{metric_name}_errors", 1)
+            except Exception:
+                track_metric(error_metric, 1)
                 raise
         
-        if asyncio.iscoroutinefunction(func):
-            return async_wrapper
-        else:
-            return sync_wrapper
+        return sync_wrapper
     
     return decorator
\ No newline at end of file
@@ -3,47 +3,81 @@
 Prompt template loader
 """
 from pathlib import Path
-from typing import Dict
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared by every loader instance, so a prompt is read from disk once per process
+_PROMPT_CACHE: Dict[Path, str] = {}
+_COMPILED_CACHE: Dict[Path, List[Tuple[str, Optional[str]]]] = {}
+
+
+def compile_template(template: str) -> List[Tuple[str, Optional[str]]]:
+    """Split a str.format template once into (literal, placeholder) pairs, with {{ }} already unescaped"""
+    return [(literal, field) for literal, field, _, _ in Formatter().parse(template)]
+
+
+def render_template(parts: List[Tuple[str, Optional[str]]], **values: str) -> str:
+    """Fill a compiled template with one join instead of re-parsing it"""
+    return "".join(literal + values[field] if field else literal for literal, field in parts)
+
 
 class PromptLoader:
     """Load and cache prompt templates"""
     
     def __init__(self, prompts_dir: str = "prompts"):
         self.prompts_dir = Path(prompts_dir)
-        self._cache: Dict[str, str] = {}
+        self._cache = _PROMPT_CACHE
+        self._compiled = _COMPILED_CACHE
     
     def load(self, filename: str) -> str:
         """Load a prompt template"""
-        # Check cache
-        if filename in self._cache:
-            return self._cache[filename]
-        
-        # Load from file
         filepath = self.prompts_dir / filename
         
-        if not filepath.exists():
-            logger.error(f"Prompt file not found: {filepath}")
-            raise FileNotFoundError(f"Prompt file not found: {filename}")
+        # Check cache
+        if filepath in self._cache:
+            return self._cache[filepath]
         
+        # Load from file (one open, no separate exists() stat)
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with open(filepath, 'rb') as f:
+                content = f.read().decode('utf-8')
             
             # Cache it
-            self._cache[filename] = content
+            self._cache[filepath] = content
             logger.debug(f"Loaded prompt: {filename}")
             
             return content
             
+        except FileNotFoundError:
+            logger.error(f"Prompt file not found: {filepath}")
+            raise FileNotFoundError(f"Prompt file not found: {filename}") from None
         except Exception as e:
             logger.error(f"Error loading prompt {filename}: {e}")
             raise
     
+    def preload(self) -> int:
+        """Read every template in the prompts directory into the shared cache; returns the count"""
+        count = 0
+        for filepath in self.prompts_dir.glob("*.txt"):
+            if filepath not in self._cache:
+                self._cache[filepath] = filepath.read_text(encoding='utf-8')
+            count += 1
+        logger.debug(f"Preloaded {count} prompts from {self.prompts_dir}")
+        return count
+    
+    def load_compiled(self, filename: str) -> List[Tuple[str, Optional[str]]]:
+        """Load a prompt template already split for render_template"""
+        filepath = self.prompts_dir / filename
+        parts = self._compiled.get(filepath)
+        if parts is None:
+            parts = self._compiled[filepath] = compile_template(self.load(filename))
+        return parts
+    
     def reload(self):
         """Clear cache to reload prompts"""
         self._cache.clear()
+        self._compiled.clear()
         logger.info("Prompt cache cleared")
\ No newline at end of file
@@ -3,8 +3,9 @@
 Background worker for processing enrichment requests
 """
 import asyncio
-import json
+import random
 from typing import Dict
+from pydantic import ValidationError
 from services import EnrichmentService
 from workers.pubsub_handler import PubSubHandler
 from utils import track_metric, log_event
@@ -13,83 +14,142 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Back-off after failed pulls: doubles from the first value up to the cap, plus jitter
+PULL_BACKOFF_INITIAL = 0.1
+PULL_BACKOFF_MAX = 30.0
+
+# Per-message debug lines are sampled: one every LOG_SAMPLE_EVERY messages
+LOG_SAMPLE_EVERY = 256
+
 
 class EnrichmentWorker:
     """Worker for processing enrichment requests from Pub/Sub"""
     
     def __init__(self):
-        self.enrichment_service = EnrichmentService()
+        # Writes are awaited so a message is only acked once its result is stored
+        self.enrichment_service = EnrichmentService(persist_in_background=False)
         self.pubsub_handler = PubSubHandler()
         self.running = False
+        self._processed = 0
+        self._tasks = []
+        # Filled by one puller; workers wake as soon as a message lands
+        self._inbox: asyncio.Queue = asyncio.Queue(maxsize=settings.MAX_WORKERS * 2)
     
     async def start(self):
         """Start the worker"""
         self.running = True
         logger.info(f"Starting enrichment worker with {settings.MAX_WORKERS} workers")
         
-        # Create worker tasks
-        tasks = []
+        # Python 3.12+: tasks run inline until their first real suspension, so
+        # anything that finishes without blocking skips a loop round trip
+        if hasattr(asyncio, "eager_task_factory"):
+            asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+        
+        # One puller feeding the inbox, plus the worker tasks draining it
+        self.pubsub_handler.start()
+        self._tasks = [asyncio.create_task(self._puller())]
         for i in range(settings.MAX_WORKERS):
-            tasks.append(asyncio.create_task(self._worker(i)))
+            self._tasks.append(asyncio.create_task(self._worker(i)))
         
         # Wait for all workers
-        await asyncio.gather(*tasks)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
     
     async def stop(self):
         """Stop the worker"""
         self.running = False
         logger.info("Stopping enrichment worker")
+        # Workers idle in inbox.get() would never see the flag
+        for task in self._tasks:
+            task.cancel()
+        # Finish in-flight writes before the last acks go out
+        await self.enrichment_service.aclose()
+        await self.pubsub_handler.aclose()
+    
+    async def _puller(self):
+        """Long-poll Pub/Sub and hand messages to the workers"""
+        loop = asyncio.get_running_loop()
+        backoff = PULL_BACKOFF_INITIAL
+        while self.running:
+            started = loop.time()
+            # Messages stay unacked until processed, so only pull what the inbox can take
+            # right away; the rest would sit in memory while their ack deadline runs down
+            free = self._inbox.maxsize - self._inbox.qsize()
+            if free <= 0:
+                await asyncio.sleep(0.05)
+                continue
+            batch = await self.pubsub_handler.pull_batch(min(free, settings.PUBSUB_BATCH_SIZE))
+            
+            if not batch:
+                # An empty long-poll already waited; an instant empty return means the pull
+                # failed, so back off exponentially (jittered so workers don't retry in step)
+                if loop.time() - started < 1:
+                    await asyncio.sleep(backoff + random.uniform(0, backoff))
+                    backoff = min(backoff * 2, PULL_BACKOFF_MAX)
+                else:
+                    backoff = PULL_BACKOFF_INITIAL
+                continue
+            
+            backoff = PULL_BACKOFF_INITIAL
+            
+            # Blocks while the inbox is full, so pulling never outruns processing
+            for item in batch:
+                await self._inbox.put(item)
     
     async def _worker(self, worker_id: int):
         """Individual worker process"""
         logger.info(f"Worker {worker_id} started")
         
         while self.running:
-            try:
-                # Pull message from Pub/Sub
-                message = await self.pubsub_handler.pull_message()
-                
-                if not message:
-                    # No messages, wait a bit
-                    await asyncio.sleep(1)
-                    continue
-                
-                # Process message
-                await self._process_message(message, worker_id)
-                
-            except Exception as e:
-                logger.error(f"Worker {worker_id} error: {e}")
-                await asyncio.sleep(5)  # Back off on error
+            message, ack_id = await self._inbox.get()
+            # _process_message handles its own errors; failed enrichments go back for redelivery
+            if await self._process_message(message, worker_id):
+                self.pubsub_handler.ack_message(ack_id)
+            else:
+                self.pubsub_handler.nack_message(ack_id)
     
-    async def _process_message(self, message: Dict, worker_id: int):
-        """Process a single message"""
+    async def _process_message(self, message: Dict, worker_id: int) -> bool:
+        """Process a single message; True to ack it, False to nack it for redelivery"""
         try:
-            logger.debug(f"Worker {worker_id} processing message")
+            self._processed += 1
+            if self._processed % LOG_SAMPLE_EVERY == 0:
+                logger.debug("Worker %d processing message (%d so far)", worker_id, self._processed)
             
             # Check if it's a batch
             if message.get("type") == "batch":
-                await self._process_batch(message, worker_id)
+                succeeded = await self._process_batch(message, worker_id)
             else:
-                await self._process_single(message, worker_id)
+                succeeded = await self._process_single(message, worker_id)
             
             # Track metrics
-            track_metric("messages_processed", 1, {"worker": str(worker_id)})
+            if succeeded:
+                track_metric("messages_processed", 1, {"worker": str(worker_id)})
+            else:
+                track_metric("processing_errors", 1, {"worker": str(worker_id)})
+            return succeeded
             
+        except ValidationError as e:
+            # Redelivering an invalid payload would fail the same way forever; ack it
+            logger.error(f"Dropping invalid message: {e}")
+            track_metric("invalid_messages", 1, {"worker": str(worker_id)})
+            return True
         except Exception as e:
             logger.error(f"Failed to process message: {e}")
             track_metric("processing_errors", 1, {"worker": str(worker_id)})
+            return False
     
-    async def _process_single(self, message: Dict, worker_id: int):
-        """Process a single enrichment request"""
+    async def _process_single(self, message: Dict, worker_id: int) -> bool:
+        """Process a single enrichment request; False if the enrichment failed"""
         from dtos import EnrichmentRequestDTO
         
         # Convert to DTO
-        request = EnrichmentRequestDTO(**message)
-        
+        return await self._enrich_request(EnrichmentRequestDTO(**message), worker_id)
+    
+    async def _enrich_request(self, request, worker_id: int) -> bool:
+        """Enrich an already validated request; False if the enrichment failed"""
         # Process
         result = await self.enrichment_service.enrich_message(request)
         
-        logger.info(f"Worker {worker_id} processed message {request.message_id}")
+        logger.info("Worker %d processed message %s", worker_id, request.message_id)
         
         # Log event
         log_event("message_enriched", {
@@ -98,15 +158,68 @@ class EnrichmentWorker:
             "status": result.status,
             "cache_hit": result.cache_hit
         })
+        
+        return result.status != "failed"
     
-    async def _process_batch(self, message: Dict, worker_id: int):
-        """Process a batch of enrichment requests"""
-        messages = message.get("messages", [])
+    async def _process_batch(self, message: Dict, worker_id: int) -> bool:
+        """Process a batch of enrichment requests; False if it has to be redelivered"""
+        from dtos import BatchEnrichmentRequestDTO, EnrichmentRequestDTO
+        
+        # Full batch requests queued by POST /enrich/batch (priority=low)
+        if "organization_id" in message:
+            batch = BatchEnrichmentRequestDTO.model_validate(
+                {key: value for key, value in message.items() if key != "type"}
+            )
+            logger.info(f"Worker {worker_id} processing batch {batch.batch_id} of {len(batch.messages)} messages")
+            # Stores the batch status and fires the webhook; per-message failures are
+            # reported there, so only a batch-level failure is worth a redelivery
+            response = await self.enrichment_service.enrich_batch(batch)
+            return response.status != "failed"
+        
+        # Validate the whole batch in one adapter call
+        requests = EnrichmentRequestDTO.validate_many(message.get("messages", []))
+        
+        logger.info(f"Worker {worker_id} processing batch of {len(requests)} messages")
+        
+        # Enrich concurrently, bounded like the API's parallel batch path
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+        
+        async def _one(request):
+            async with semaphore:
+                return await self._enrich_request(request, worker_id)
         
-        logger.info(f"Worker {worker_id} processing batch of {len(messages)} messages")
+        results = await asyncio.gather(*(_one(request) for request in requests), return_exceptions=True)
         
-        # Process each message
-        for msg_data in messages:
-            await self._process_single(msg_data, worker_id)
+        failures = [(request, result) for request, result in zip(requests, results) if result is not True]
+        for request, error in failures:
+            reason = error if isinstance(error, Exception) else "enrichment failed"
+            logger.error(f"Worker {worker_id} failed message {request.message_id}: {reason}")
         
-        logger.info(f"Worker {worker_id} completed batch processing")
\ No newline at end of file
+        logger.info(f"Worker {worker_id} completed batch processing ({len(failures)} failed)")
+        
+        # Redelivery replays the whole batch; already-enriched messages come back as cache hits
+        return not failures
+
+
+async def _run_standalone():
+    """Worker process entry point (SERVICE_MODE=worker in Dockerfile.prod)"""
+    worker = EnrichmentWorker()
+    try:
+        await worker.start()
+    finally:
+        await worker.stop()
+
+
+if __name__ == "__main__":
+    import uvloop
+    from utils.monitoring import setup_monitoring, shutdown_monitoring
+    
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    setup_monitoring()
+    try:
+        # libuv loop, as the API process gets through uvicorn's --loop uvloop
+        uvloop.run(_run_standalone())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_monitoring()
@@ -2,74 +2,157 @@
 """
 Pub/Sub message handler
 """
-import json
-from typing import Optional, Dict
-from google.cloud import pubsub_v1
-from google.api_core import retry
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import orjson
+from google.pubsub_v1 import SubscriberAsyncClient
+from google.api_core import retry_async
 from config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pub/Sub accepts at most this many ack IDs per acknowledge / modifyAckDeadline call
+MAX_ACK_IDS = 2500
+
 
 class PubSubHandler:
     """Handle Pub/Sub operations for the worker"""
     
     def __init__(self):
-        self.subscriber = pubsub_v1.SubscriberClient()
+        # grpc.aio client: pulls and acks are awaited on the worker's loop, no thread hops
+        self.subscriber = SubscriberAsyncClient()
         self.subscription_path = self.subscriber.subscription_path(
             settings.GCP_PROJECT_ID,
             settings.PUBSUB_SUBSCRIPTION
         )
+        # Acks go out after processing, batched off the worker's critical path
+        self._acks: asyncio.Queue = asyncio.Queue()
+        self._nacks: asyncio.Queue = asyncio.Queue()
+        self._flushers: List[asyncio.Task] = []
+        # Unacked messages being processed (ack_id -> pull time); the lease task keeps
+        # extending their ack deadline so long batches aren't redelivered mid-flight
+        self._leases: Dict[str, float] = {}
     
-    async def pull_message(self) -> Optional[Dict]:
-        """Pull a single message from Pub/Sub"""
+    async def pull_batch(self, max_messages: Optional[int] = None) -> List[Tuple[Dict, str]]:
+        """Pull up to max_messages messages as (data, ack_id); ack or nack each once handled"""
         try:
-            # Pull with immediate return
-            response = self.subscriber.pull(
+            # Long-poll: returns once messages arrive or the timeout passes
+            response = await self.subscriber.pull(
                 request={
                     "subscription": self.subscription_path,
-                    "max_messages": 1,
-                    "return_immediately": True
+                    "max_messages": max_messages or settings.PUBSUB_BATCH_SIZE
                 },
-                retry=retry.Retry(deadline=10)
+                retry=retry_async.AsyncRetry(deadline=10),
+                timeout=10
             )
             
-            if not response.received_messages:
-                return None
+            batch = []
+            pulled_at = asyncio.get_running_loop().time()
+            for received in response.received_messages:
+                try:
+                    batch.append((orjson.loads(received.message.data), received.ack_id))
+                    self._leases[received.ack_id] = pulled_at
+                except orjson.JSONDecodeError as e:
+                    # Acked anyway: a malformed payload would only be redelivered forever
+                    logger.error(f"Dropping malformed message {received.message.message_id}: {e}")
+                    self.ack_message(received.ack_id)
             
-            # Get the message
-            message = response.received_messages[0]
+            logger.debug(f"Pulled {len(batch)} messages")
             
-            # Parse message data
-            data = json.loads(message.message.data.decode('utf-8'))
+            return batch
             
-            # Acknowledge the message
-            self.subscriber.acknowledge(
+        except Exception as e:
+            logger.error(f"Failed to pull messages: {e}")
+            return []
+    
+    def start(self):
+        """Start the background tasks that send queued acks and nacks and extend leases"""
+        self._flushers = [
+            asyncio.create_task(self._flush(self._acks, self._acknowledge)),
+            asyncio.create_task(self._flush(self._nacks, self._nack)),
+            asyncio.create_task(self._extend_leases()),
+        ]
+    
+    async def aclose(self):
+        """Stop the flushers and send whatever acks and nacks are still queued"""
+        for task in self._flushers:
+            task.cancel()
+        await asyncio.gather(*self._flushers, return_exceptions=True)
+        self._flushers = []
+        for ids, send in ((self._acks, self._acknowledge), (self._nacks, self._nack)):
+            while not ids.empty():
+                await send(self._drain(ids, [ids.get_nowait()]))
+    
+    def ack_message(self, ack_id: str):
+        """Queue an acknowledgement; sent in bulk by the ack flusher"""
+        self._leases.pop(ack_id, None)
+        self._acks.put_nowait(ack_id)
+    
+    def nack_message(self, ack_id: str):
+        """Queue a negative acknowledgement (for retry); sent in bulk by the nack flusher"""
+        self._leases.pop(ack_id, None)
+        self._nacks.put_nowait(ack_id)
+    
+    @staticmethod
+    def _drain(ids: asyncio.Queue, ack_ids: List[str]) -> List[str]:
+        while len(ack_ids) < MAX_ACK_IDS and not ids.empty():
+            ack_ids.append(ids.get_nowait())
+        return ack_ids
+    
+    async def _flush(self, ids: asyncio.Queue, send: Callable[[List[str]], Awaitable[None]]):
+        # Each RPC carries everything queued while the previous one was in flight
+        while True:
+            ack_ids = self._drain(ids, [await ids.get()])
+            await send(ack_ids)
+    
+    async def _extend_leases(self):
+        """Periodically push out the ack deadline of every message still being processed"""
+        loop = asyncio.get_running_loop()
+        # Renew at half the deadline so one slow or failed RPC doesn't let a lease lapse
+        interval = max(1, settings.PUBSUB_ACK_DEADLINE // 2)
+        while True:
+            await asyncio.sleep(interval)
+            now = loop.time()
+            # Past the max lease a message is left to expire and be redelivered
+            expired = [
+                ack_id for ack_id, pulled_at in self._leases.items()
+                if now - pulled_at > settings.PUBSUB_MAX_LEASE
+            ]
+            for ack_id in expired:
+                del self._leases[ack_id]
+            if expired:
+                logger.warning(f"Stopped extending {len(expired)} messages past the max lease")
+            ack_ids = list(self._leases)
+            for i in range(0, len(ack_ids), MAX_ACK_IDS):
+                await self._modify_deadline(ack_ids[i:i + MAX_ACK_IDS], settings.PUBSUB_ACK_DEADLINE, "Extended")
+    
+    async def _modify_deadline(self, ack_ids: List[str], seconds: int, action: str):
+        try:
+            await self.subscriber.modify_ack_deadline(
                 request={
                     "subscription": self.subscription_path,
-                    "ack_ids": [message.ack_id]
+                    "ack_ids": ack_ids,
+                    "ack_deadline_seconds": seconds
                 }
             )
-            
-            logger.debug(f"Pulled message: {message.message.message_id}")
-            
-            return data
-            
+            logger.debug(f"{action} {len(ack_ids)} messages")
         except Exception as e:
-            logger.error(f"Failed to pull message: {e}")
-            return None
+            logger.error(f"Failed to modify ack deadline of {len(ack_ids)} messages: {e}")
     
-    async def nack_message(self, ack_id: str):
-        """Negative acknowledge a message (for retry)"""
+    async def _acknowledge(self, ack_ids: List[str]):
         try:
-            self.subscriber.modify_ack_deadline(
+            await self.subscriber.acknowledge(
                 request={
                     "subscription": self.subscription_path,
-                    "ack_ids": [ack_id],
-                    "ack_deadline_seconds": 0
+                    "ack_ids": ack_ids
                 }
             )
-            logger.debug(f"Nacked message: {ack_id}")
+            logger.debug(f"Acked {len(ack_ids)} messages")
         except Exception as e:
-            logger.error(f"Failed to nack message: {e}")
\ No newline at end of file
+            logger.error(f"Failed to ack {len(ack_ids)} messages: {e}")
+    
+    async def _nack(self, ack_ids: List[str]):
+        # A delayed redelivery instead of deadline 0, so a message that keeps failing doesn't
+        # spin in a hot loop; attach a dead-letter policy to the subscription to cap retries
+        await self._modify_deadline(ack_ids, settings.PUBSUB_NACK_DELAY, "Nacked")